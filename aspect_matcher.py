@@ -0,0 +1,347 @@
+"""
+Aspect grouping for travel reviews.
+
+Finds the sentences of a review that mention each travel aspect group and
+averages per-sentence scores back into per-aspect sentiment. Shared by the
+BERT analyzer and the lexicon cascade so both report the same aspects.
+
+The vocabulary is compiled once into an inverted index from normalised
+word to aspect groups (multiword terms are indexed by their first word).
+A review is split into sentences and tokenized once, and each token is
+looked up once, so matching cost depends on the review's length and not
+on the number of terms. Terms match whole words only ("room" does not
+match "bathroom"), so other inflections ("transportation", "traveling")
+are listed as terms of their own; English plurals are handled by indexing
+each word under its candidate singulars ("movies": "movie" or "movy",
+"sizes": "size" or "siz"), which only match when a term has them. Apostrophes
+separate words, so elided articles ("l'hôtel", "all'aeroporto") and
+possessives ("the hotel's pool") don't hide a term. Terms in
+scripts written without spaces (Chinese, Japanese, Thai) are matched
+inside the sentence text instead.
+
+Usage:
+    # Time the index against substring matching with thousands of terms
+    python aspect_matcher.py --terms 5000 --reviews 2000
+"""
+import argparse
+import json
+import random
+import re
+import time
+import unicodedata
+from typing import Dict, FrozenSet, List, Mapping, Optional, Sequence, Set, Tuple
+
+from intent_router import KeywordAutomaton
+from language_scripts import script_counts
+
+# Related aspect terms, grouped under the name reported to the user
+ASPECT_GROUPS: Dict[str, List[str]] = {
+    "accommodation": ["hotel", "accommodation", "room"],
+    "dining": ["food", "restaurant", "dining"],
+    "transportation": ["transport", "transportation", "travel", "traveling", "travelling",
+                       "traveled", "travelled", "flight"],
+    "service": ["service", "staff", "customer service"],
+    "location": ["location", "located", "place", "destination"],
+    "value": ["price", "priced", "pricing", "cost", "value"],
+    "cleanliness": ["cleanliness", "hygiene", "maintenance"],
+    "activities": ["activities", "entertainment", "attractions"]
+}
+
+# Scripts written without spaces between words
+UNSPACED_SCRIPTS = frozenset(["han", "kana", "thai"])
+
+_SENTENCE_PATTERN = re.compile(r"[^.!?。！？\n]+")
+# Apostrophes split words: "l'hotel" -> "l", "hotel"
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def _normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def _forms(word: str) -> Tuple[str, ...]:
+    """
+    The word followed by its candidate singulars if it may be an English plural.
+
+    "es" is only stripped alone after a sibilant ("beaches"); otherwise both
+    the "-s" and "-es" forms are candidates, and "ies" also yields "-y".
+    """
+    if len(word) <= 3 or not word.endswith("s") or word.endswith("ss"):
+        return (word,)
+    if word.endswith(("ches", "shes", "xes", "sses")):
+        return word, word[:-2], word[:-1]
+    if word.endswith("ies"):
+        return word, word[:-3] + "y", word[:-1]
+    if word.endswith("es"):
+        return word, word[:-1], word[:-2]
+    return word, word[:-1]
+
+
+def _words(text: str) -> List[str]:
+    return _WORD_PATTERN.findall(text)
+
+
+class AspectMatcher:
+    """Maps the sentences of a review to aspect groups using a precompiled term index."""
+
+    def __init__(self, groups: Mapping[str, Sequence[str]] = ASPECT_GROUPS):
+        """
+        Args:
+            groups: Aspect group name -> terms in any language; a term may be
+                several words and may belong to several groups
+        """
+        self.groups = list(groups)
+        # Every form of a term's first word -> [(forms of each remaining word, groups)]
+        self._index: Dict[str, List[Tuple[Tuple[FrozenSet[str], ...], Set[str]]]] = {}
+        unspaced: Dict[str, Set[str]] = {}
+        self.term_count = 0
+
+        phrases: Dict[Tuple[str, ...], Set[str]] = {}
+        for group, terms in groups.items():
+            for term in terms:
+                normalized = _normalize(term).strip()
+                if not normalized:
+                    continue
+                self.term_count += 1
+                if UNSPACED_SCRIPTS & set(script_counts(normalized)):
+                    unspaced.setdefault(normalized, set()).add(group)
+                    continue
+                words = tuple(_words(normalized))
+                if words:
+                    phrases.setdefault(words, set()).add(group)
+
+        for words, term_groups in phrases.items():
+            entry = (tuple(frozenset(_forms(word)) for word in words[1:]), term_groups)
+            for form in _forms(words[0]):
+                self._index.setdefault(form, []).append(entry)
+
+        self._unspaced_groups = unspaced
+        self._automaton = KeywordAutomaton(unspaced) if unspaced else None
+
+    def __len__(self) -> int:
+        """Number of terms in the vocabulary."""
+        return self.term_count
+
+    @staticmethod
+    def split_sentences(text: str) -> List[str]:
+        """Split text into stripped, non-empty sentences in a single pass."""
+        sentences = []
+        for match in _SENTENCE_PATTERN.finditer(text):
+            sentence = match.group().strip()
+            if sentence:
+                sentences.append(sentence)
+        return sentences
+
+    def sentence_groups(self, sentence: str) -> Set[str]:
+        """Return the aspect groups mentioned in one sentence."""
+        normalized = _normalize(sentence)
+        found: Set[str] = set()
+        forms = [_forms(word) for word in _words(normalized)]
+        index = self._index
+        for i, word_forms in enumerate(forms):
+            for form in word_forms:
+                for rest, term_groups in index.get(form, ()):
+                    following = forms[i + 1:i + 1 + len(rest)]
+                    if len(following) == len(rest) and all(
+                            not allowed.isdisjoint(candidates) for allowed, candidates in zip(rest, following)):
+                        found |= term_groups
+        if self._automaton is not None:
+            for term in self._automaton.find_all(normalized):
+                found |= self._unspaced_groups[term]
+        return found
+
+    def match(self, text: str) -> Dict[str, List[str]]:
+        """
+        Find the sentences of text that mention each aspect group.
+
+        Args:
+            text: Review text
+
+        Returns:
+            Group name -> sentences mentioning one of its terms, in text
+            order (groups without any are left out)
+        """
+        group_sentences: Dict[str, List[str]] = {}
+        for sentence in self.split_sentences(text):
+            for group in self.sentence_groups(sentence):
+                group_sentences.setdefault(group, []).append(sentence)
+        # Report groups in vocabulary order, as the analyzers always have
+        return {group: group_sentences[group] for group in self.groups if group in group_sentences}
+
+
+def load_vocabulary(path: str) -> Dict[str, List[str]]:
+    """Read an aspect vocabulary: a JSON object of group name -> list of terms."""
+    with open(path, encoding="utf-8") as f:
+        vocabulary = json.load(f)
+    if not isinstance(vocabulary, dict) or not all(isinstance(terms, list) for terms in vocabulary.values()):
+        raise ValueError(f"{path} must map aspect group names to lists of terms")
+    return vocabulary
+
+
+_matchers: Dict[str, AspectMatcher] = {}
+
+
+def get_aspect_matcher(path: Optional[str] = None) -> AspectMatcher:
+    """
+    Return the shared matcher for a vocabulary file.
+
+    Args:
+        path: JSON vocabulary (ASPECT_VOCABULARY_PATH from config.py by
+            default; the built-in ASPECT_GROUPS when that is empty)
+    """
+    if path is None:
+        from config import ASPECT_VOCABULARY_PATH
+        path = ASPECT_VOCABULARY_PATH or ""
+    matcher = _matchers.get(path)
+    if matcher is None:
+        matcher = _matchers[path] = AspectMatcher(load_vocabulary(path) if path else ASPECT_GROUPS)
+    return matcher
+
+
+def find_aspect_sentences(text: str, matcher: Optional[AspectMatcher] = None) -> Dict[str, List[str]]:
+    """
+    Find the sentences of text that mention each aspect group.
+
+    Args:
+        text: Review text
+        matcher: Matcher to use (the shared configured one by default)
+
+    Returns:
+        Group name -> sentences mentioning one of its terms (groups without
+        any are left out)
+    """
+    return (matcher or get_aspect_matcher()).match(text)
+
+
+def average_aspect_scores(group_sentences: Mapping[str, Sequence[str]],
+                          sentence_scores: Mapping[str, float],
+                          labels: Mapping[int, str]) -> Dict[str, Dict[str, object]]:
+    """
+    Average sentence scores into per-aspect sentiment.
+
+    Args:
+        group_sentences: Output of find_aspect_sentences
+        sentence_scores: Sentence -> 1-5 score; unscored sentences are skipped
+        labels: Rounded score -> sentiment label
+
+    Returns:
+        Group name -> {"sentiment", "score"}
+    """
+    aspects = {}
+    for group, sentences in group_sentences.items():
+        sentiments = [sentence_scores[s] for s in sentences if s in sentence_scores]
+        if sentiments:
+            avg_sentiment = sum(sentiments) / len(sentiments)
+            aspects[group] = {
+                "sentiment": labels[round(avg_sentiment)],
+                "score": avg_sentiment
+            }
+    return aspects
+
+
+# Reviews on which the index must find every group the substring scan finds,
+# with vocabulary beyond the built-in English terms
+EQUIVALENCE_GROUPS: Dict[str, List[str]] = {
+    **ASPECT_GROUPS,
+    "accommodation": ASPECT_GROUPS["accommodation"] + ["hôtel", "albergo", "camera"],
+    "transportation": ASPECT_GROUPS["transportation"] + ["aeroporto", "aéroport", "gare"],
+    "dining": ASPECT_GROUPS["dining"] + ["ristorante", "cuisine"],
+    "activities": ASPECT_GROUPS["activities"] + ["movie", "beach", "size"]
+}
+EQUIVALENCE_REVIEWS = [
+    "Ho visitato l'hotel. Il personale era gentile",
+    "Siamo arrivati all'aeroporto in ritardo. La camera dell'albergo era pulita",
+    "Le ristorante est loin de l'hôtel. Navette pratique jusqu'à l'aéroport",
+    "On a raté le train à la gare d'Austerlitz. La cuisine de l'hôtel était excellente",
+    "The hotel's pool was cold. Our flight's delay ruined the day",
+    "The staff’s attitude was great. Food at the restaurant was cheap",
+    "Great hotels, bad flights. The prices were fair",
+    "Public transportation was excellent. Traveling by train was easy",
+    "The movies on the flight were old. The beaches and the attraction sizes were lovely"
+]
+
+
+def equivalence_mismatches(groups: Mapping[str, Sequence[str]] = EQUIVALENCE_GROUPS,
+                           reviews: Sequence[str] = EQUIVALENCE_REVIEWS) -> List[str]:
+    """
+    Reviews where the index misses a group the substring scan finds.
+
+    The index matches whole words only, so it may find fewer groups when a
+    term is part of a longer word ("room" in "bathroom"); the sample
+    reviews avoid that, so any miss is a tokenization regression.
+    """
+    matcher = AspectMatcher(groups)
+    return [review for review in reviews
+            if set(_substring_match(groups, review)) - set(matcher.match(review))]
+
+
+def _substring_match(groups: Mapping[str, Sequence[str]], text: str) -> Dict[str, List[str]]:
+    """The previous per-group substring scan, kept as the benchmark baseline."""
+    group_sentences = {}
+    for group, terms in groups.items():
+        sentences = [s.strip() for s in text.split('.') if any(term in s.lower() for term in terms)]
+        if sentences:
+            group_sentences[group] = sentences
+    return group_sentences
+
+
+def benchmark(term_count: int, review_count: int, seed: int = 0) -> Dict:
+    """
+    Time the indexed matcher against the substring scan on synthetic reviews.
+
+    Returns:
+        Build time and per-review latency percentiles in microseconds
+    """
+    from benchmark import percentiles_us
+
+    rng = random.Random(seed)
+    syllables = ["ka", "lo", "mi", "ra", "tu", "ve", "sa", "no", "bri", "sto", "quen", "dar", "fel", "gor"]
+    groups = {group: list(terms) for group, terms in ASPECT_GROUPS.items()}
+    names = list(groups)
+    while sum(len(terms) for terms in groups.values()) < term_count:
+        term = "".join(rng.choice(syllables) for _ in range(rng.randint(2, 4)))
+        if rng.random() < 0.2:
+            term += " " + "".join(rng.choice(syllables) for _ in range(2))
+        groups[rng.choice(names)].append(term)
+
+    filler = ["the", "was", "very", "and", "our", "a", "bit", "really", "we", "loved", "hated", "it"]
+    vocabulary = [term for terms in groups.values() for term in terms]
+    reviews = []
+    for _ in range(review_count):
+        sentences = []
+        for _ in range(rng.randint(2, 8)):
+            words = [rng.choice(filler) for _ in range(rng.randint(5, 15))]
+            words.insert(rng.randrange(len(words)), rng.choice(vocabulary))
+            sentences.append(" ".join(words))
+        reviews.append(". ".join(sentences) + ".")
+
+    start = time.perf_counter()
+    matcher = AspectMatcher(groups)
+    build_seconds = time.perf_counter() - start
+
+    report = {"terms": len(matcher), "reviews": review_count, "build_ms": 1000 * build_seconds}
+    scan_reviews = reviews[:max(1, review_count // 10)]
+    for name, match, sample in (("index", matcher.match, reviews),
+                                ("substring_scan", lambda r: _substring_match(groups, r), scan_reviews)):
+        timings = []
+        for review in sample:
+            start = time.perf_counter()
+            match(review)
+            timings.append(time.perf_counter() - start)
+        report[f"{name}_us"] = percentiles_us(timings)
+    report["mismatches"] = len(equivalence_mismatches())
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the indexed aspect matcher")
+    parser.add_argument("--terms", type=int, default=5000)
+    parser.add_argument("--reviews", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps(benchmark(args.terms, args.reviews, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Offline benchmark of the inference and routing hot paths.
+
+Runs without network access. The classifiers are small randomly
+initialised BERTs built locally (see inference_backends.build_tiny_model),
+the reviews come from synthetic_reviews.py, and the travel questions are
+routed through the content pack's IntentRouter exactly as
+app.get_travel_response does, without Streamlit. Every case reports
+throughput, p50/p95/p99 latency per call and the process's peak RSS after
+the case.
+
+A report can be saved as a JSON baseline and later runs compared against
+it. The comparison exits non-zero when a case's p95 latency or throughput
+is worse than the baseline by more than --tolerance.
+
+Usage:
+    python benchmark.py --save baselines/local.json
+    python benchmark.py --compare baselines/local.json --tolerance 0.25
+    python benchmark.py --cases travel_response analyze_batch --batch-sizes 1 32
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+CASES = ("analyze", "analyze_batch", "analyze_aspects", "detect", "travel_response")
+DEFAULT_BATCH_SIZES = (1, 8, 32, 128)
+
+# Fields compared against a baseline, and whether larger is better
+COMPARED_FIELDS = {"p95_ms": False, "items_per_second": True}
+
+
+def peak_rss_mib() -> Optional[float]:
+    """Peak resident set size of this process in MiB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _percentile_ms(samples: List[float], fraction: float) -> float:
+    return 1000 * samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def percentiles_ms(samples: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99/max of durations in seconds, in milliseconds (all 0 for no samples)."""
+    samples = sorted(samples)
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    return {"p50": _percentile_ms(samples, 0.50), "p95": _percentile_ms(samples, 0.95),
+            "p99": _percentile_ms(samples, 0.99), "max": 1000 * samples[-1]}
+
+
+def percentiles_us(samples: Sequence[float]) -> Dict[str, float]:
+    """p50/p95/p99/max of durations in seconds, in microseconds (for the micro-benchmarks)."""
+    return {name: 1000 * value for name, value in percentiles_ms(samples).items()}
+
+
+def run_case(calls: Sequence, fn: Callable, items_per_call: Callable[[object], int] = lambda call: 1,
+             warmup: int = 3) -> Dict[str, float]:
+    """
+    Time fn over every call argument.
+
+    Args:
+        calls: Arguments, one per timed call
+        fn: Function under test
+        items_per_call: Number of items (e.g. texts) in one call's argument
+        warmup: Untimed calls made first, so lazy initialisation isn't measured
+
+    Returns:
+        Call count, throughput in items per second, latency percentiles per
+        call in milliseconds and peak RSS
+    """
+    for call in calls[:warmup]:
+        fn(call)
+    timings = []
+    items = 0
+    for call in calls:
+        start = time.perf_counter()
+        fn(call)
+        timings.append(time.perf_counter() - start)
+        items += items_per_call(call)
+    total = sum(timings)
+    timings.sort()
+    return {
+        "calls": len(timings),
+        "items": items,
+        "items_per_second": items / total if total else float("inf"),
+        "p50_ms": _percentile_ms(timings, 0.50),
+        "p95_ms": _percentile_ms(timings, 0.95),
+        "p99_ms": _percentile_ms(timings, 0.99),
+        "peak_rss_mib": peak_rss_mib()
+    }
+
+
+def travel_questions(destinations: Sequence[str], count: int, seed: int = 0) -> List[str]:
+    """Deterministic mix of destination, topic and unmatched questions."""
+    rng = random.Random(seed)
+    templates = [
+        "What are the famous places in {d}?",
+        "How much money should I budget for {d}?",
+        "Any tips for visiting {d}?",
+        "What should I pack for a beach holiday?",
+        "Is it safe to walk around at night?",
+        "How do I get around, is there a good train network?",
+        "Can you suggest a cheap hostel to stay in?",
+        "What local customs and etiquette should I know?",
+        "Hello, what can you do?"
+    ]
+    return [rng.choice(templates).format(d=rng.choice(destinations)) for _ in range(count)]
+
+
+def language_samples(count: int, seed: int = 0) -> List[str]:
+    """Reviews mixed with phrases in the content pack's languages, so both detection paths run."""
+    from content_pack import get_content_pack
+    from synthetic_reviews import generate_reviews
+
+    pack = get_content_pack()
+    phrases = [phrase for category in pack.phrase_categories()
+               for language in pack.phrase_languages(category)
+               for phrase in pack.phrases(category, language)]
+    texts = generate_reviews(count, seed=seed + 1, max_sentences=3) + phrases
+    rng = random.Random(seed)
+    return [rng.choice(texts) for _ in range(count)]
+
+
+def run_suite(cases: Sequence[str] = CASES, samples: int = 200,
+              batch_sizes: Sequence[int] = DEFAULT_BATCH_SIZES,
+              backend: str = "torch", threads: Optional[int] = None, seed: int = 0) -> Dict:
+    """
+    Run the selected benchmark cases.
+
+    Args:
+        cases: Names from CASES
+        samples: Texts (or questions) timed per case
+        batch_sizes: Batch sizes for the analyze_batch case
+        backend: Inference backend for the classifiers
+        threads: torch intra-op threads (torch's default if None)
+        seed: Seed for the synthetic data and model weights
+
+    Returns:
+        Run metadata and one result row per case
+    """
+    from synthetic_reviews import generate_reviews
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "samples": samples,
+            "seed": seed,
+            "backend": backend
+        },
+        "cases": {}
+    }
+    reviews = generate_reviews(samples, seed=seed)
+
+    if "travel_response" in cases:
+        from content_pack import get_content_pack
+        from intent_router import IntentRouter
+
+        pack = get_content_pack()
+        router = IntentRouter(pack.destinations, pack.travel_responses(), pack.default_travel_response())
+        questions = travel_questions(list(pack.destinations), samples, seed)
+        report["cases"]["travel_response"] = run_case(questions, router.respond)
+
+    model_cases = [case for case in cases if case != "travel_response"]
+    if not model_cases:
+        return report
+
+    import torch
+    from deep_learning import LanguageDetector, SentimentAnalyzer
+    from inference_backends import build_tiny_model
+    from language_scripts import ISO_LANGUAGE_NAMES
+
+    if threads:
+        torch.set_num_threads(threads)
+    report["meta"]["torch"] = torch.__version__
+    report["meta"]["threads"] = torch.get_num_threads()
+
+    if {"analyze", "analyze_batch", "analyze_aspects"} & set(model_cases):
+        analyzer = SentimentAnalyzer(build_tiny_model(seed=seed), backend=backend)
+        if "analyze" in model_cases:
+            report["cases"]["analyze"] = run_case(reviews, analyzer.analyze)
+        if "analyze_batch" in model_cases:
+            for size in batch_sizes:
+                batches = [reviews[i:i + size] for i in range(0, len(reviews), size)]
+                report["cases"][f"analyze_batch[{size}]"] = run_case(
+                    batches, lambda batch: analyzer.analyze_batch(batch, show_progress=False),
+                    items_per_call=len, warmup=1)
+        if "analyze_aspects" in model_cases:
+            report["cases"]["analyze_aspects"] = run_case(reviews, analyzer._analyze_aspects)
+
+    if "detect" in model_cases:
+        # No result cache, so repeated samples are measured on the script or model path
+        detector = LanguageDetector(build_tiny_model(seed=seed, labels=list(ISO_LANGUAGE_NAMES)),
+                                    backend=backend, cache_size=0)
+        report["cases"]["detect"] = run_case(language_samples(samples, seed), detector.detect)
+        report["cases"]["detect"]["script_rate"] = detector.stats()["script_hit_rate"]
+    return report
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    List the regressions of a report against a baseline.
+
+    Args:
+        current: Report from run_suite
+        baseline: Earlier report
+        tolerance: Allowed relative slowdown, e.g. 0.25 for 25%
+
+    Returns:
+        One message per case and field that regressed beyond the tolerance
+    """
+    regressions = []
+    for case, row in current["cases"].items():
+        reference = baseline.get("cases", {}).get(case)
+        if reference is None:
+            continue
+        for field, higher_is_better in COMPARED_FIELDS.items():
+            new, old = row.get(field), reference.get(field)
+            if not new or not old:
+                continue
+            change = (old - new) / old if higher_is_better else (new - old) / old
+            if change > tolerance:
+                regressions.append(f"{case}: {field} {old:.3f} -> {new:.3f} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the inference and routing hot paths offline")
+    parser.add_argument("--cases", nargs="*", choices=CASES, default=list(CASES))
+    parser.add_argument("--samples", type=int, default=200, help="Texts or questions per case")
+    parser.add_argument("--batch-sizes", type=int, nargs="*", default=list(DEFAULT_BATCH_SIZES))
+    parser.add_argument("--backend", default="torch", help="Inference backend: torch or int8")
+    parser.add_argument("--threads", type=int, help="torch intra-op threads")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", help="Write the report to this JSON baseline file")
+    parser.add_argument("--compare", help="Baseline JSON file to check the report against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    report = run_suite(args.cases, args.samples, args.batch_sizes, args.backend, args.threads, args.seed)
+    print(json.dumps(report, indent=2))
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print("\n".join(regressions), file=sys.stderr)
+            raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
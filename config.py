@@ -7,6 +7,13 @@ load_dotenv()
 # API Keys
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 
+# LLM client (point OPENAI_BASE_URL at mock_llm_server.py to work offline)
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL') or None
+LLM_MODEL = os.getenv('LLM_MODEL', 'gpt-3.5-turbo')
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '30'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '3'))
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+
 # Supported Languages
 LANGUAGES = {
     "English": "English",
@@ -23,4 +30,72 @@ LANGUAGES = {
 }
 
 # Azure Translator API Configuration
-TRANSLATOR_ENDPOINT = "https://api.cognitive.microsofttranslator.com" 
\ No newline at end of file
+TRANSLATOR_ENDPOINT = "https://api.cognitive.microsofttranslator.com" 
+
+# Persistent sentiment result cache (set the path to an empty string to disable)
+SENTIMENT_CACHE_PATH = os.getenv('SENTIMENT_CACHE_PATH', os.path.join('.cache', 'sentiment_cache.sqlite3'))
+SENTIMENT_CACHE_MAX_ENTRIES = int(os.getenv('SENTIMENT_CACHE_MAX_ENTRIES', '100000'))
+
+# Micro-batching of concurrent sentiment requests
+SENTIMENT_MAX_BATCH_SIZE = int(os.getenv('SENTIMENT_MAX_BATCH_SIZE', '32'))
+SENTIMENT_MAX_WAIT_MS = float(os.getenv('SENTIMENT_MAX_WAIT_MS', '10'))
+
+# Reviews whose lexicon confidence reaches this skip the sentiment model (above 1 disables the shortcut)
+SENTIMENT_CASCADE_THRESHOLD = float(os.getenv('SENTIMENT_CASCADE_THRESHOLD', '0.75'))
+
+# Optional JSON file of aspect group -> terms (any language) replacing the built-in travel aspects
+ASPECT_VOCABULARY_PATH = os.getenv('ASPECT_VOCABULARY_PATH', '')
+
+# Classifier models: Hugging Face model ids, or local snapshots written by model_snapshot.py
+SENTIMENT_MODEL = os.getenv('SENTIMENT_MODEL', 'nlptown/bert-base-multilingual-uncased-sentiment')
+LANGUAGE_MODEL = os.getenv('LANGUAGE_MODEL', 'papluca/xlm-roberta-base-language-detection')
+
+# The Translation page's "auto" source uses a detected language only above this confidence
+LANGUAGE_DETECTION_MIN_CONFIDENCE = float(os.getenv('LANGUAGE_DETECTION_MIN_CONFIDENCE', '0.8'))
+
+# Texts longer than the models' 512 tokens are classified as overlapping windows sharing
+# WINDOW_OVERLAP tokens (empty to truncate them instead), combined by "mean_logits" or "length_weighted"
+_window_overlap = os.getenv('WINDOW_OVERLAP', '128')
+WINDOW_OVERLAP = int(_window_overlap) if _window_overlap else None
+WINDOW_AGGREGATION = os.getenv('WINDOW_AGGREGATION', 'mean_logits')
+
+# Per-stage latency histograms for the classifiers ("1" to enable), served in Prometheus
+# format on METRICS_PORT (empty to not serve them)
+INSTRUMENTATION_ENABLED = os.getenv('INSTRUMENTATION_ENABLED', '0') == '1'
+_metrics_port = os.getenv('METRICS_PORT', '')
+METRICS_PORT = int(_metrics_port) if _metrics_port else None
+
+# Address of a shared inference_service.py; when set the UI sends sentiment and language
+# requests there instead of loading the models itself
+INFERENCE_SERVICE_URL = os.getenv('INFERENCE_SERVICE_URL', '')
+INFERENCE_SERVICE_TIMEOUT = float(os.getenv('INFERENCE_SERVICE_TIMEOUT', '60'))
+
+# Inference backend for the classifiers: "torch", "int8" or "onnx"
+INFERENCE_BACKEND = os.getenv('INFERENCE_BACKEND', 'torch')
+SENTIMENT_ONNX_PATH = os.getenv('SENTIMENT_ONNX_PATH')
+LANGUAGE_ONNX_PATH = os.getenv('LANGUAGE_ONNX_PATH')
+
+# Translation backend ("google" or the offline "local" stand-in) and its cache
+TRANSLATOR_BACKEND = os.getenv('TRANSLATOR_BACKEND', 'google')
+TRANSLATION_CACHE_PATH = os.getenv('TRANSLATION_CACHE_PATH', os.path.join('.cache', 'translation_cache.sqlite3'))
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv('TRANSLATION_CACHE_MAX_ENTRIES', '100000'))
+
+# Bulk translation: concurrent requests; backend requests started per second across the process (0 = unlimited)
+TRANSLATION_MAX_WORKERS = int(os.getenv('TRANSLATION_MAX_WORKERS', '4'))
+TRANSLATION_RATE_LIMIT = float(os.getenv('TRANSLATION_RATE_LIMIT', '5'))
+
+# Semantic cache for travel advice: encoder ("minilm", which needs torch and a model download;
+# the cache is disabled if it can't load), similarity threshold and limits
+SEMANTIC_CACHE_ENABLED = os.getenv('SEMANTIC_CACHE_ENABLED', '1') == '1'
+SEMANTIC_CACHE_ENCODER = os.getenv('SEMANTIC_CACHE_ENCODER', 'minilm')
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', '0.85'))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv('SEMANTIC_CACHE_MAX_ENTRIES', '1000'))
+SEMANTIC_CACHE_TTL = float(os.getenv('SEMANTIC_CACHE_TTL', '86400'))
+
+# Stock of AI-generated exercises per language and difficulty, topped up in the background
+# and saved to EXERCISE_POOL_PATH (empty to keep it in memory only)
+EXERCISE_POOL_PATH = os.getenv('EXERCISE_POOL_PATH', os.path.join('.cache', 'exercise_pool.json'))
+EXERCISE_POOL_SIZE = int(os.getenv('EXERCISE_POOL_SIZE', '12'))
+
+# Phrases, exercises and destination guides (a versioned content pack directory)
+CONTENT_PACK_PATH = os.getenv('CONTENT_PACK_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'content', 'v1'))
@@ -0,0 +1,165 @@
+"""
+Versioned on-disk content: phrases, exercises, destination guides and canned answers.
+
+A pack is a directory with a ``manifest.json`` index and one JSON file per
+(category, language) slice or destination. Only the manifest is read up
+front; slices are loaded the first time they are asked for and kept in a
+bounded cache, so the number of languages and destinations shipped does
+not affect startup time or resident memory.
+
+Usage:
+    # Summarise a pack and check that every slice it lists loads
+    python content_pack.py --path content/v1
+"""
+import argparse
+import json
+import os
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
+
+SUPPORTED_VERSION = 1
+
+DEFAULT_PACK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "content", "v1")
+
+
+@lru_cache(maxsize=256)
+def _load_slice(path: str) -> Any:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+class LazyDestinations(Mapping):
+    """Read-only mapping of destination name to guide, loading each guide on first access."""
+
+    def __init__(self, pack: "ContentPack"):
+        self._pack = pack
+
+    def __getitem__(self, name: str) -> Dict[str, str]:
+        return self._pack.destination(name)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._pack.manifest["destinations"])
+
+    def __len__(self) -> int:
+        return len(self._pack.manifest["destinations"])
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._pack.manifest["destinations"]
+
+
+class ContentPack:
+    """Accessors for one content pack directory."""
+
+    def __init__(self, path: str = DEFAULT_PACK_PATH):
+        """
+        Args:
+            path: Pack directory containing manifest.json
+        """
+        self.path = path
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self.version = self.manifest.get("version")
+        if self.version != SUPPORTED_VERSION:
+            raise ValueError(f"Unsupported content pack version {self.version!r} in {path}")
+        self.destinations = LazyDestinations(self)
+
+    def _slice(self, relative_path: str) -> Any:
+        return _load_slice(os.path.join(self.path, relative_path))
+
+    def phrase_categories(self) -> List[str]:
+        return list(self.manifest["phrases"])
+
+    def phrase_languages(self, category: Optional[str] = None) -> List[str]:
+        """Languages with phrases in category (the first category by default)."""
+        category = category or self.phrase_categories()[0]
+        return list(self.manifest["phrases"][category])
+
+    def phrases(self, category: str, language: str) -> List[str]:
+        """
+        Return the phrases for one category and language.
+
+        Args:
+            category: Phrase category, e.g. "Greetings"
+            language: Lower-case language name, e.g. "spanish"
+
+        Returns:
+            Phrases with their English meaning
+        """
+        return self._slice(self.manifest["phrases"][category][language])
+
+    def exercise_levels(self) -> List[str]:
+        return list(self.manifest["exercises"])
+
+    def exercise_languages(self, level: Optional[str] = None) -> List[str]:
+        """Languages with exercises at level (the first level by default)."""
+        level = level or self.exercise_levels()[0]
+        return list(self.manifest["exercises"][level])
+
+    def exercises(self, level: str, language: str) -> List[Dict[str, str]]:
+        """Return the question/answer exercises for one difficulty level and language."""
+        return self._slice(self.manifest["exercises"][level][language])
+
+    def destination(self, name: str) -> Dict[str, str]:
+        """Return the guide sections (famous_places, budget, ...) for one destination."""
+        return self._slice(self.manifest["destinations"][name])
+
+    def travel_responses(self) -> Dict[str, str]:
+        """Return the canned answers for general travel topics."""
+        return self._slice(self.manifest["travel_responses"])["topics"]
+
+    def default_travel_response(self) -> str:
+        """Return the answer given when a question matches no topic."""
+        return self._slice(self.manifest["travel_responses"])["default"]
+
+    def slice_paths(self) -> List[str]:
+        """Every slice file the manifest refers to, relative to the pack directory."""
+        paths = [self.manifest["travel_responses"]]
+        for section in ("phrases", "exercises"):
+            for languages in self.manifest[section].values():
+                paths.extend(languages.values())
+        paths.extend(self.manifest["destinations"].values())
+        return paths
+
+
+_packs: Dict[str, ContentPack] = {}
+
+
+def get_content_pack(path: Optional[str] = None) -> ContentPack:
+    """Return the shared ContentPack for path (CONTENT_PACK_PATH from config.py by default)."""
+    if path is None:
+        from config import CONTENT_PACK_PATH
+        path = CONTENT_PACK_PATH
+    pack = _packs.get(path)
+    if pack is None:
+        pack = _packs[path] = ContentPack(path)
+    return pack
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarise and validate a content pack")
+    parser.add_argument("--path", default=DEFAULT_PACK_PATH)
+    args = parser.parse_args()
+
+    pack = ContentPack(args.path)
+    paths = pack.slice_paths()
+    missing = [p for p in paths if not os.path.exists(os.path.join(pack.path, p))]
+    for path in paths:
+        if path not in missing:
+            pack._slice(path)
+    print(json.dumps({
+        "path": pack.path,
+        "version": pack.version,
+        "phrase_categories": len(pack.phrase_categories()),
+        "exercise_levels": len(pack.exercise_levels()),
+        "destinations": len(pack.destinations),
+        "slices": len(paths),
+        "bytes": sum(os.path.getsize(os.path.join(pack.path, p)) for p in paths if p not in missing),
+        "missing": missing
+    }, indent=2))
+    if missing:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
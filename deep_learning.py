@@ -1,20 +1,191 @@
 import torch
-import transformers
-from typing import List, Dict, Union
+import numpy as np
+from typing import Iterator, List, Dict, Optional, Sequence, Tuple, Union
+import hashlib
+import json
 import logging
+import unicodedata
 from tqdm import tqdm
+from aspect_matcher import average_aspect_scores, find_aspect_sentences
+from disk_cache import DiskCache, LRUCache
+from inference_backends import create_backend
+from instrumentation import get_instrumentation
+from language_scripts import ISO_LANGUAGE_NAMES, detect_script_language
+from model_snapshot import load_classifier
+from sentiment_columns import SentimentColumns
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def plan_length_batches(lengths: List[int],
+                        max_batch_tokens: int,
+                        max_batch_size: Optional[int] = None) -> List[List[int]]:
+    """
+    Group sequences of similar length into batches under a padded token budget.
+    
+    Args:
+        lengths: Tokenized length of each sequence
+        max_batch_tokens: Maximum of (batch size x longest sequence) per batch
+        max_batch_size: Optional cap on the number of sequences per batch
+        
+    Returns:
+        List of batches, each a list of indices into lengths
+    """
+    batches = []
+    current = []
+    for index in sorted(range(len(lengths)), key=lengths.__getitem__):
+        # Sequences arrive shortest first, so the newest one sets the padded length
+        padded_tokens = (len(current) + 1) * lengths[index]
+        full = max_batch_size is not None and len(current) >= max_batch_size
+        if current and (padded_tokens > max_batch_tokens or full):
+            batches.append(current)
+            current = []
+        current.append(index)
+    if current:
+        batches.append(current)
+    return batches
+
+WINDOW_AGGREGATIONS = ("mean_logits", "length_weighted")
+
+def predict_probabilities(tokenizer, backend, device,
+                          texts: List[str],
+                          batch_size: Optional[int] = None,
+                          max_batch_tokens: int = 8192,
+                          show_progress: bool = False,
+                          window_overlap: Optional[int] = None,
+                          aggregation: str = "mean_logits",
+                          max_length: int = 512,
+                          component: str = "model") -> Iterator[Tuple[List[int], torch.Tensor]]:
+    """
+    Run texts through a classifier in length-grouped batches.
+    
+    By default each text is truncated to max_length tokens. With
+    window_overlap set, a longer text is split into max_length-token windows
+    that overlap by window_overlap tokens instead. The windows of all texts
+    are packed into the same batches, and each text's window logits are
+    combined before the softmax: averaged ("mean_logits"), or weighted by
+    window length ("length_weighted", so a short trailing window counts
+    less). Either way the work is linear in the total number of tokens.
+    
+    The tokenize, transfer, forward and softmax stages are timed under
+    component when instrumentation is enabled (see instrumentation.py).
+    
+    Args:
+        tokenizer: Hugging Face tokenizer (a fast one for windows)
+        backend: Inference backend returning logits
+        device: Device the inputs are moved to
+        texts: Texts to classify
+        batch_size: Maximum number of sequences per batch (no limit by default)
+        max_batch_tokens: Maximum padded tokens (sequences x longest sequence) per batch
+        show_progress: Whether to show progress bar
+        window_overlap: Tokens shared by consecutive windows (None truncates)
+        aggregation: How window logits are combined, one of WINDOW_AGGREGATIONS
+        max_length: Tokens per sequence or window, special tokens included
+        component: Name the stage timings are recorded under
+        
+    Yields:
+        After every batch, the positions in texts whose prediction is now
+        complete and their class probabilities (a text split over several
+        batches completes with its last window)
+    """
+    if not texts:
+        return
+    instrumentation = get_instrumentation()
+    # Without a sync the forward timer would only measure the kernel launches
+    synchronize = instrumentation.enabled and str(device).startswith("cuda")
+    # Tokenize once without padding; each batch is padded separately
+    with instrumentation.time(component, "tokenize"):
+        if window_overlap is None:
+            encodings = tokenizer(texts, truncation=True, max_length=max_length)
+            owners = None
+        else:
+            encodings = tokenizer(texts, truncation=True, max_length=max_length, stride=window_overlap,
+                                  return_overflowing_tokens=True)
+            owners = np.asarray(encodings.pop("overflow_to_sample_mapping"))
+    if owners is not None:
+        remaining = np.bincount(owners, minlength=len(texts))
+        totals = None
+        weights = torch.zeros(len(texts), 1)
+    lengths = [len(ids) for ids in encodings["input_ids"]]
+    batches = plan_length_batches(lengths, max_batch_tokens, batch_size)
+    iterator = tqdm(batches) if show_progress else batches
+    
+    for batch_positions in iterator:
+        with instrumentation.time(component, "tokenize"):
+            inputs = tokenizer.pad(
+                {k: [encodings[k][p] for p in batch_positions] for k in encodings.keys()},
+                return_tensors="pt"
+            )
+        with instrumentation.time(component, "transfer"):
+            inputs = {k: v.to(device) for k, v in inputs.items()}
+        
+        with torch.no_grad():
+            with instrumentation.time(component, "forward"):
+                logits = backend(inputs)
+                if synchronize:
+                    torch.cuda.synchronize(device)
+            with instrumentation.time(component, "transfer"):
+                logits = logits.float().cpu()
+        
+        with instrumentation.time(component, "softmax"):
+            if owners is None:
+                completed = batch_positions
+                predictions = torch.nn.functional.softmax(logits, dim=-1)
+            else:
+                # Accumulate the windows' logits onto their texts
+                batch_owners = owners[batch_positions]
+                window_weights = torch.ones(len(batch_positions), 1) if aggregation == "mean_logits" else \
+                    torch.tensor([[float(lengths[p])] for p in batch_positions])
+                if totals is None:
+                    totals = torch.zeros(len(texts), logits.shape[-1])
+                index = torch.from_numpy(batch_owners)
+                totals.index_add_(0, index, logits * window_weights)
+                weights.index_add_(0, index, window_weights)
+                np.subtract.at(remaining, batch_owners, 1)
+                
+                completed = [int(i) for i in np.unique(batch_owners) if remaining[i] == 0]
+                completed_index = torch.tensor(completed, dtype=torch.long)
+                combined = totals[completed_index] / weights[completed_index]
+                predictions = torch.nn.functional.softmax(combined, dim=-1)
+        yield completed, predictions
+
 class SentimentAnalyzer:
-    def __init__(self):
-        self.tokenizer = transformers.AutoTokenizer.from_pretrained('nlptown/bert-base-multilingual-uncased-sentiment')
-        self.model = transformers.AutoModelForSequenceClassification.from_pretrained('nlptown/bert-base-multilingual-uncased-sentiment')
+    def __init__(self, model_name: str = 'nlptown/bert-base-multilingual-uncased-sentiment',
+                 revision: Optional[str] = None,
+                 cache: Optional[DiskCache] = None,
+                 backend: str = "torch",
+                 onnx_path: Optional[str] = None,
+                 window_overlap: Optional[int] = None,
+                 aggregation: str = "mean_logits"):
+        """
+        Args:
+            model_name: Hugging Face model id, local directory or snapshot (see model_snapshot.py)
+                of the sentiment classifier
+            revision: Model revision to load (defaults to the latest; snapshots are pinned)
+            cache: Optional persistent cache for analysis results
+            backend: Inference backend: "torch", "int8" (dynamic quantization) or "onnx"
+            onnx_path: Exported model file, required by the "onnx" backend
+            window_overlap: Score texts longer than 512 tokens as overlapping windows
+                sharing this many tokens (None truncates them)
+            aggregation: How window predictions are combined: "mean_logits" or "length_weighted"
+        """
+        if aggregation not in WINDOW_AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation {aggregation!r}; expected one of {WINDOW_AGGREGATIONS}")
+        self.model_name = model_name
+        self.window_overlap = window_overlap
+        self.aggregation = aggregation
+        # The onnx backend only needs the config, not the PyTorch weights
+        loaded = load_classifier(model_name, revision, weights=backend != "onnx")
+        self.tokenizer = loaded.tokenizer
+        self.load_seconds = loaded.seconds
+        # Resolved commit hash, so cached results are invalidated by model updates
+        self.revision = loaded.revision
+        self.cache = cache
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model.to(self.device)
-        self.model.eval()
+        self.backend = create_backend(backend, loaded.model, self.device, onnx_path)
+        self.device = self.backend.device
+        self.model = getattr(self.backend, "model", None)
         
         self.sentiment_mapping = {
             1: "Very Negative",
@@ -36,6 +207,16 @@ class SentimentAnalyzer:
             "activities", "entertainment", "attractions"
         ]
     
+    def _cache_key(self, text: str, include_aspects: bool) -> str:
+        """Build the cache key for a text from its normalized form and the model identity."""
+        normalized = " ".join(unicodedata.normalize("NFKC", text).split())
+        identity = [self.model_name, self.revision, self.backend.name, include_aspects]
+        if self.window_overlap is not None:
+            # Windowed results differ from truncated ones for long texts
+            identity += [self.window_overlap, self.aggregation]
+        payload = json.dumps(identity + [normalized])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
     def analyze(self, text: str, include_aspects: bool = False) -> Dict[str, Union[str, float, Dict]]:
         """
         Analyze sentiment of a single text.
@@ -47,19 +228,16 @@ class SentimentAnalyzer:
         Returns:
             Dictionary containing sentiment analysis results
         """
+        if self.cache is not None:
+            key = self._cache_key(text, include_aspects)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return {**cached, "text": text}
+        
         try:
-            inputs = self.tokenizer(text, 
-                                  return_tensors="pt", 
-                                  truncation=True, 
-                                  max_length=512)
-            inputs = {k: v.to(self.device) for k, v in inputs.items()}
-            
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-            
-            score = torch.argmax(predictions).item() + 1
-            confidence = predictions[0][score-1].item()
+            for _, scores, confidences in self._predict_batches([text], None, 8192, False):
+                if len(scores):
+                    score, confidence = int(scores[0]), float(confidences[0])
             
             result = {
                 "text": text,
@@ -72,6 +250,9 @@ class SentimentAnalyzer:
             if include_aspects:
                 result["aspects"] = self._analyze_aspects(text)
             
+            if self.cache is not None:
+                self.cache.set(key, result)
+            
             return result
             
         except Exception as e:
@@ -79,53 +260,79 @@ class SentimentAnalyzer:
             return {"error": str(e)}
     
     def analyze_batch(self, texts: List[str], 
-                     batch_size: int = 16, 
+                     batch_size: Optional[int] = None, 
                      include_aspects: bool = False,
-                     show_progress: bool = True) -> List[Dict[str, Union[str, float, Dict]]]:
+                     show_progress: bool = True,
+                     max_batch_tokens: int = 8192) -> List[Dict[str, Union[str, float, Dict]]]:
         """
         Analyze sentiment of multiple texts in batches.
         
+        Texts are grouped by tokenized length so that each batch is padded to
+        a similar length, and batches are sized by a padded token budget rather
+        than a fixed number of texts. Results are returned in input order.
+        When a cache is configured, only texts that are not already cached
+        are sent through the model.
+        
         Args:
             texts: List of texts to analyze
-            batch_size: Size of batches for processing
+            batch_size: Maximum number of texts per batch (no limit by default)
             include_aspects: Whether to include aspect-based sentiment analysis
             show_progress: Whether to show progress bar
+            max_batch_tokens: Maximum padded tokens (texts x longest text) per batch
             
         Returns:
             List of dictionaries containing sentiment analysis results
         """
-        results = []
-        iterator = tqdm(range(0, len(texts), batch_size)) if show_progress else range(0, len(texts), batch_size)
+        results = [None] * len(texts)
+        
+        # Only texts that miss the cache are sent to the model
+        keys = None
+        pending = list(range(len(texts)))
+        if self.cache is not None:
+            keys = [self._cache_key(text, include_aspects) for text in texts]
+            cached = self.cache.get_many(keys)
+            first_index = {}
+            pending = []
+            for i, key in enumerate(keys):
+                if key in cached:
+                    results[i] = {**cached[key], "text": texts[i]}
+                elif key not in first_index:
+                    # Duplicate texts within the call are scored once
+                    first_index[key] = i
+                    pending.append(i)
         
         try:
-            for i in iterator:
-                batch = texts[i:i + batch_size]
-                inputs = self.tokenizer(batch, 
-                                      return_tensors="pt", 
-                                      truncation=True, 
-                                      max_length=512, 
-                                      padding=True)
-                inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            instrumentation = get_instrumentation()
+            pending_texts = [texts[j] for j in pending]
+            for batch_positions, scores, confidences in self._predict_batches(
+                    pending_texts, batch_size, max_batch_tokens, show_progress):
+                with instrumentation.time("sentiment", "results"):
+                    batch_results = []
+                    for p, score, confidence in zip(batch_positions, scores.tolist(), confidences.tolist()):
+                        j = pending[p]
+                        result = {
+                            "text": texts[j],
+                            "sentiment": self.sentiment_mapping[score],
+                            "score": score,
+                            "confidence": confidence
+                        }
+                        results[j] = result
+                        batch_results.append((j, result))
                 
-                with torch.no_grad():
-                    outputs = self.model(**inputs)
-                    predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
+                # Aspect sentences go through analyze_batch again, which times its own stages
+                if include_aspects:
+                    for j, result in batch_results:
+                        result["aspects"] = self._analyze_aspects(texts[j])
                 
-                scores = torch.argmax(predictions, dim=1) + 1
-                confidences = torch.gather(predictions, 1, (scores - 1).unsqueeze(1)).squeeze()
-                
-                for text, score, confidence in zip(batch, scores, confidences):
-                    result = {
-                        "text": text,
-                        "sentiment": self.sentiment_mapping[score.item()],
-                        "score": score.item(),
-                        "confidence": confidence.item()
-                    }
-                    
-                    if include_aspects:
-                        result["aspects"] = self._analyze_aspects(text)
-                    
-                    results.append(result)
+                if keys is not None and batch_results:
+                    with instrumentation.time("sentiment", "results"):
+                        self.cache.set_many({keys[j]: result for j, result in batch_results})
+            
+            # Fill in duplicates of texts scored in this call
+            if keys is not None:
+                for i, result in enumerate(results):
+                    if result is None:
+                        results[i] = {**results[first_index[keys[i]]], "text": texts[i]}
             
             return results
             
@@ -133,6 +340,58 @@ class SentimentAnalyzer:
             logger.error(f"Error in batch sentiment analysis: {str(e)}")
             return [{"error": str(e)}]
     
+    def _predict_batches(self, texts: List[str],
+                         batch_size: Optional[int],
+                         max_batch_tokens: int,
+                         show_progress: bool) -> Iterator[Tuple[List[int], np.ndarray, np.ndarray]]:
+        """
+        Run texts through the model in length-grouped batches (windowed if configured).
+        
+        Yields:
+            Positions in texts completed by each batch, with their 1-5 scores and confidences
+        """
+        instrumentation = get_instrumentation()
+        for positions, predictions in predict_probabilities(
+                self.tokenizer, self.backend, self.device, texts, batch_size, max_batch_tokens,
+                show_progress, self.window_overlap, self.aggregation, component="sentiment"):
+            with instrumentation.time("sentiment", "postprocess"):
+                confidences, indices = predictions.max(dim=1)
+                scores, confidences = (indices + 1).numpy(), confidences.numpy()
+            yield positions, scores, confidences
+    
+    def analyze_batch_columns(self, texts: Sequence[str],
+                              batch_size: Optional[int] = None,
+                              show_progress: bool = False,
+                              max_batch_tokens: int = 8192) -> SentimentColumns:
+        """
+        Analyze sentiment of many texts into NumPy arrays.
+        
+        Batches like analyze_batch, but writes each batch's scores straight
+        into preallocated arrays: no result dictionary is built and no text
+        is copied per row. The result cache is not consulted, and errors
+        are raised rather than returned.
+        
+        Args:
+            texts: Texts to analyze
+            batch_size: Maximum number of texts per batch (no limit by default)
+            show_progress: Whether to show progress bar
+            max_batch_tokens: Maximum padded tokens (texts x longest text) per batch
+            
+        Returns:
+            score, label_index and confidence arrays in input order
+        """
+        scores = np.zeros(len(texts), dtype=np.int8)
+        confidences = np.zeros(len(texts), dtype=np.float32)
+        try:
+            for batch_positions, batch_scores, batch_confidences in self._predict_batches(
+                    texts if isinstance(texts, list) else list(texts), batch_size, max_batch_tokens, show_progress):
+                scores[batch_positions] = batch_scores
+                confidences[batch_positions] = batch_confidences
+        except Exception as e:
+            logger.error(f"Error in columnar sentiment analysis: {str(e)}")
+            raise
+        return SentimentColumns.from_scores(scores, confidences)
+    
     def _analyze_aspects(self, text: str) -> Dict[str, Dict[str, Union[str, float]]]:
         """
         Analyze sentiment for specific aspects in the text.
@@ -143,76 +402,154 @@ class SentimentAnalyzer:
         Returns:
             Dictionary containing aspect-based sentiment analysis
         """
-        aspects_found = {}
-        text_lower = text.lower()
-        
-        # Group related aspects
-        aspect_groups = {
-            "accommodation": ["hotel", "accommodation", "room"],
-            "dining": ["food", "restaurant", "dining"],
-            "transportation": ["transport", "travel", "flight"],
-            "service": ["service", "staff", "customer service"],
-            "location": ["location", "place", "destination"],
-            "value": ["price", "cost", "value"],
-            "cleanliness": ["cleanliness", "hygiene", "maintenance"],
-            "activities": ["activities", "entertainment", "attractions"]
+        group_sentences = find_aspect_sentences(text)
+        if not group_sentences:
+            return {}
+        
+        # Score every unique sentence once, in a single padded batch
+        unique_sentences = list(dict.fromkeys(
+            sentence for sentences in group_sentences.values() for sentence in sentences
+        ))
+        batch_results = self.analyze_batch(unique_sentences, show_progress=False)
+        sentence_scores = {
+            sentence: result["score"]
+            for sentence, result in zip(unique_sentences, batch_results)
+            if "error" not in result
         }
         
-        for group, terms in aspect_groups.items():
-            # Find sentences containing aspect terms
-            sentences = [s for s in text.split('.') if any(term in s.lower() for term in terms)]
-            
-            if sentences:
-                # Analyze sentiment for each relevant sentence
-                sentiments = []
-                for sentence in sentences:
-                    result = self.analyze(sentence)
-                    if "error" not in result:
-                        sentiments.append(result["score"])
-                
-                if sentiments:
-                    avg_sentiment = sum(sentiments) / len(sentiments)
-                    aspects_found[group] = {
-                        "sentiment": self.sentiment_mapping[round(avg_sentiment)],
-                        "score": avg_sentiment
-                    }
-        
-        return aspects_found
+        # Fan the sentence scores back out to their aspect groups
+        return average_aspect_scores(group_sentences, sentence_scores, self.sentiment_mapping)
 
 class LanguageDetector:
-    def __init__(self):
-        self.model = transformers.AutoModelForSequenceClassification.from_pretrained('papluca/xlm-roberta-base-language-detection')
-        self.tokenizer = transformers.AutoTokenizer.from_pretrained('papluca/xlm-roberta-base-language-detection')
-        self.model.eval()
-        
-        self.id2label = {
-            0: "Arabic",
-            1: "Chinese",
-            2: "English",
-            3: "French",
-            4: "German",
-            5: "Hindi",
-            6: "Italian",
-            7: "Japanese",
-            8: "Korean",
-            9: "Spanish"
-        }
+    def __init__(self, model_name: str = 'papluca/xlm-roberta-base-language-detection',
+                 backend: str = "torch",
+                 onnx_path: Optional[str] = None,
+                 cache_size: int = 4096,
+                 use_script: bool = True,
+                 window_overlap: Optional[int] = None,
+                 aggregation: str = "mean_logits"):
+        """
+        Args:
+            model_name: Hugging Face model id, local directory or snapshot (see model_snapshot.py)
+                of the language classifier
+            backend: Inference backend: "torch", "int8" (dynamic quantization) or "onnx"
+            onnx_path: Exported model file, required by the "onnx" backend
+            cache_size: Number of detection results kept in memory
+            use_script: Answer from the Unicode script alone when it settles the language
+            window_overlap: Classify texts longer than 512 tokens as overlapping windows
+                sharing this many tokens (None truncates them)
+            aggregation: How window predictions are combined: "mean_logits" or "length_weighted"
+        """
+        if aggregation not in WINDOW_AGGREGATIONS:
+            raise ValueError(f"Unknown aggregation {aggregation!r}; expected one of {WINDOW_AGGREGATIONS}")
+        self.model_name = model_name
+        self.window_overlap = window_overlap
+        self.aggregation = aggregation
+        loaded = load_classifier(model_name, weights=backend != "onnx")
+        self.tokenizer = loaded.tokenizer
+        self.load_seconds = loaded.seconds
+        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.backend = create_backend(backend, loaded.model, self.device, onnx_path)
+        self.device = self.backend.device
+        self.model = getattr(self.backend, "model", None)
+        self.use_script = use_script
+        self.cache = LRUCache(cache_size)
+        
+        # The model's labels are ISO 639-1 codes
+        self.id2code = {int(i): code for i, code in loaded.config.id2label.items()}
+        self.id2label = {i: ISO_LANGUAGE_NAMES.get(code, code) for i, code in self.id2code.items()}
+        
+        self.requests = 0
+        self.cache_hits = 0
+        self.script_hits = 0
+        self.model_hits = 0
+        self.model_texts = 0
+        self.model_batches = 0
     
     def detect(self, text: str) -> Dict[str, Union[str, float]]:
-        try:
-            inputs = self.tokenizer(text, return_tensors="pt", truncation=True, max_length=512)
-            
-            with torch.no_grad():
-                outputs = self.model(**inputs)
-                predictions = torch.nn.functional.softmax(outputs.logits, dim=-1)
-            
-            score = torch.argmax(predictions).item()
-            confidence = predictions[0][score].item()
+        """
+        Detect the language of a text.
+        
+        Returns:
+            Dictionary with the language name, ISO code, confidence and the
+            path that answered ("cache", "script" or "model")
+        """
+        return self.detect_batch([text])[0]
+    
+    def detect_batch(self, texts: List[str],
+                     batch_size: Optional[int] = None,
+                     max_batch_tokens: int = 8192) -> List[Dict[str, Union[str, float]]]:
+        """
+        Detect the language of multiple texts.
+        
+        Each text is answered from the result cache, then from its script,
+        and only otherwise by the model, in length-grouped batches.
+        
+        Args:
+            texts: List of texts
+            batch_size: Maximum number of texts per model batch (no limit by default)
+            max_batch_tokens: Maximum padded tokens (texts x longest text) per batch
             
-            return {
-                "language": self.id2label[score],
-                "confidence": confidence
-            }
+        Returns:
+            One result dictionary per text, in input order
+        """
+        results = [None] * len(texts)
+        keys = [" ".join(unicodedata.normalize("NFKC", text).split()) for text in texts]
+        pending = {}
+        for i, key in enumerate(keys):
+            self.requests += 1
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.cache_hits += 1
+                results[i] = {**cached, "source": "cache"}
+                continue
+            script = detect_script_language(key) if self.use_script else None
+            if script is not None:
+                self.script_hits += 1
+                code, share = script
+                results[i] = {"language": ISO_LANGUAGE_NAMES.get(code, code), "code": code,
+                              "confidence": share, "source": "script"}
+                self.cache.set(key, {k: v for k, v in results[i].items() if k != "source"})
+                continue
+            # Duplicates within the call share one model result
+            pending.setdefault(key, []).append(i)
+        
+        if not pending:
+            return results
+        
+        try:
+            instrumentation = get_instrumentation()
+            unique = list(pending)
+            for batch_positions, predictions in predict_probabilities(
+                    self.tokenizer, self.backend, self.device, unique, batch_size, max_batch_tokens,
+                    window_overlap=self.window_overlap, aggregation=self.aggregation, component="language"):
+                self.model_batches += 1
+                self.model_texts += len(batch_positions)
+                with instrumentation.time("language", "postprocess"):
+                    confidences, labels = predictions.max(dim=-1)
+                    for p, label, confidence in zip(batch_positions, labels.tolist(), confidences.tolist()):
+                        result = {"language": self.id2label[label], "code": self.id2code[label],
+                                  "confidence": confidence}
+                        self.cache.set(unique[p], result)
+                        for i in pending[unique[p]]:
+                            self.model_hits += 1
+                            results[i] = {**result, "source": "model"}
+            return results
         except Exception as e:
             logger.error(f"Error in language detection: {str(e)}")
-            return {"error": str(e)} 
\ No newline at end of file
+            return [result if result is not None else {"error": str(e)} for result in results]
+    
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Return how many requests each path answered and the resulting hit rates."""
+        requests = self.requests or 1
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "script_hits": self.script_hits,
+            "model_hits": self.model_hits,
+            "model_texts": self.model_texts,
+            "model_batches": self.model_batches,
+            "cache_hit_rate": self.cache_hits / requests,
+            "script_hit_rate": self.script_hits / requests,
+            "model_rate": self.model_hits / requests
+        } 
\ No newline at end of file
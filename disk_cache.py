@@ -0,0 +1,235 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Union
+
+
+class LRUCache:
+    """Thread-safe in-memory LRU cache; the in-process counterpart of DiskCache."""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Return hit/miss counters and the current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self),
+            "max_entries": self.max_entries
+        }
+
+
+class DiskCache:
+    """
+    Size-bounded LRU cache persisted in SQLite.
+
+    The database file can be shared by every Streamlit session and by other
+    processes on the same host; SQLite's WAL mode serialises the writers.
+    Values must be JSON serialisable.
+    """
+
+    # Evict in bulk once we are this many rows over the limit, so the
+    # (linear) eviction query doesn't run on every write.
+    EVICTION_SLACK = 0.05
+    # Other processes' inserts are invisible to this one, so the table is
+    # recounted after this many new rows here; with N writers the table can
+    # overshoot the limit by at most about N x COUNT_EVERY rows.
+    COUNT_EVERY = 100
+
+    def __init__(self, path: str, max_entries: int = 100_000, timeout: float = 30.0):
+        """
+        Args:
+            path: Location of the SQLite database file
+            max_entries: Maximum number of entries kept before evicting the least recently used
+            timeout: Seconds to wait for a lock held by another process
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._local = threading.local()
+        self._stats_lock = threading.Lock()
+        # Guards _counted_entries and _inserted_since_count, updated by every writing thread
+        self._count_lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)")
+        # Row count at the last COUNT(*) and rows this process has added since
+        self._counted_entries = len(self)
+        self._inserted_since_count = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # sqlite3 connections cannot be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss."""
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Look up several keys at once.
+
+        Args:
+            keys: Cache keys to look up
+
+        Returns:
+            Dictionary of the keys that were found and their values
+        """
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        conn = self._connection()
+
+        # Stay below SQLite's default limit on bound parameters
+        for i in range(0, len(keys), 500):
+            chunk = keys[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows = conn.execute(
+                f"SELECT key, value FROM entries WHERE key IN ({placeholders})", chunk
+            ).fetchall()
+            found.update((key, json.loads(value)) for key, value in rows)
+
+        if found:
+            now = time.time()
+            with conn:
+                conn.executemany(
+                    "UPDATE entries SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+
+        with self._stats_lock:
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+        return found
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a single value."""
+        self.set_many({key: value})
+
+    def set_many(self, items: Dict[str, Any]) -> None:
+        """Store several values and evict old entries if the cache is over its limit."""
+        if not items:
+            return
+        now = time.time()
+        rows = [(key, json.dumps(value), now) for key, value in items.items()]
+        conn = self._connection()
+        with conn:
+            # Only rows that didn't exist yet grow the table
+            inserted = conn.executemany(
+                "INSERT OR IGNORE INTO entries (key, value, last_access) VALUES (?, ?, ?)", rows
+            ).rowcount
+            if inserted < len(rows):
+                conn.executemany(
+                    "UPDATE entries SET value = ?, last_access = ? WHERE key = ?",
+                    [(value, last_access, key) for key, value, last_access in rows]
+                )
+        self._evict_if_needed(inserted)
+
+    def _evict_if_needed(self, inserted: int) -> None:
+        limit = self.max_entries * (1 + self.EVICTION_SLACK)
+        with self._count_lock:
+            self._inserted_since_count += inserted
+            if (self._counted_entries + self._inserted_since_count <= limit
+                    and self._inserted_since_count < self.COUNT_EVERY):
+                return
+            # This thread recounts; rows other threads add meanwhile count towards the next check
+            self._inserted_since_count = 0
+        # Other processes write to the same file, so only trust a real count
+        conn = self._connection()
+        count = conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        with self._count_lock:
+            self._counted_entries = count
+        if count <= limit:
+            return
+        with conn:
+            cursor = conn.execute(
+                "DELETE FROM entries WHERE key IN ("
+                " SELECT key FROM entries ORDER BY last_access ASC LIMIT ?)",
+                (count - self.max_entries,)
+            )
+        with self._count_lock:
+            self._counted_entries = count - cursor.rowcount
+        with self._stats_lock:
+            self.evictions += cursor.rowcount
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM entries")
+        with self._count_lock:
+            self._counted_entries = 0
+            self._inserted_since_count = 0
+        with self._stats_lock:
+            self.hits = self.misses = self.evictions = 0
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Return hit/miss counters for this process and the current size."""
+        with self._stats_lock:
+            hits, misses, evictions = self.hits, self.misses, self.evictions
+        lookups = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / lookups if lookups else 0.0,
+            "evictions": evictions,
+            "entries": len(self),
+            "max_entries": self.max_entries
+        }
@@ -0,0 +1,264 @@
+"""
+Prefetched pool of LLM-generated language exercises.
+
+Generating a set of exercises takes a multi-second LLM call. The pool keeps
+a stock of exercises per (language, difficulty) and tops it up on
+background threads whenever it runs low, so serving a set is a local read.
+Generated items are checked against the question/answer/hint schema and
+deduplicated against everything already pooled or served before they are
+stocked. The stock and the record of served questions are saved to a JSON
+file, so a restart neither loses prefetched exercises nor repeats old ones.
+"""
+import json
+import logging
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+EXERCISE_FIELDS = ("question", "answer", "hint")
+
+# Questions remembered per pool so they are not served again
+MAX_SERVED = 2000
+
+_FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+
+def validate_exercise(item) -> Optional[Dict[str, str]]:
+    """
+    Check one generated exercise against the schema.
+
+    Returns:
+        The exercise with stripped question, answer and hint strings (hint
+        may be empty), or None if question or answer is missing or not a string
+    """
+    if not isinstance(item, dict):
+        return None
+    exercise = {}
+    for field in EXERCISE_FIELDS:
+        value = item.get(field, "" if field == "hint" else None)
+        if not isinstance(value, str):
+            return None
+        exercise[field] = value.strip()
+    if not exercise["question"] or not exercise["answer"]:
+        return None
+    return exercise
+
+
+def parse_exercises(content: str) -> List[Dict[str, str]]:
+    """
+    Extract the valid exercises from an LLM reply.
+
+    Accepts a bare JSON array, an object wrapping one (e.g. {"exercises": [...]}),
+    either inside a Markdown code fence, or an array embedded in surrounding
+    prose. Items that fail validate_exercise are dropped.
+
+    Returns:
+        The valid exercises, or [] if no JSON array can be found
+    """
+    if not isinstance(content, str):
+        return []
+    fenced = _FENCE_PATTERN.search(content)
+    candidates = [fenced.group(1)] if fenced else []
+    candidates.append(content)
+    start, end = content.find("["), content.rfind("]")
+    if 0 <= start < end:
+        candidates.append(content[start:end + 1])
+
+    for candidate in candidates:
+        try:
+            parsed = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(parsed, dict):
+            parsed = next((value for value in parsed.values() if isinstance(value, list)), None)
+        if isinstance(parsed, list):
+            return [exercise for exercise in map(validate_exercise, parsed) if exercise is not None]
+    return []
+
+
+def _fingerprint(exercise: Dict[str, str]) -> str:
+    """Questions that differ only in case, spacing or punctuation count as duplicates."""
+    return " ".join(re.sub(r"[^\w\s]", " ", exercise["question"].casefold()).split())
+
+
+class ExercisePool:
+    """Per-(language, difficulty) stock of generated exercises, refilled in the background."""
+
+    def __init__(self, generate: Callable[[str, str], List[Dict]],
+                 path: Optional[str] = None,
+                 target_size: int = 12,
+                 refill_below: Optional[int] = None,
+                 max_attempts: int = 3,
+                 max_workers: int = 2):
+        """
+        Args:
+            generate: Returns a list of exercise dictionaries for (language, difficulty),
+                e.g. utils.generate_exercises with raise_errors=True; called on the
+                pool's worker threads, and should raise on failure so it is counted
+            path: JSON file the pool is saved to and loaded from (memory only if None)
+            target_size: Exercises a refill stocks up to
+            refill_below: Stock level that triggers a refill (half of target_size by default)
+            max_attempts: Generation calls per refill before giving up
+            max_workers: Refills running at once
+        """
+        self.generate = generate
+        self.path = path
+        self.target_size = target_size
+        self.refill_below = target_size // 2 if refill_below is None else refill_below
+        self.max_attempts = max_attempts
+
+        self._pools: Dict[Tuple[str, str], List[Dict[str, str]]] = {}
+        # Ordered set of served fingerprints per pool, oldest first
+        self._served: Dict[Tuple[str, str], Dict[str, None]] = {}
+        self._refilling = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="exercise-pool")
+
+        self.served = 0
+        self.generated = 0
+        self.invalid = 0
+        self.duplicates = 0
+        self.failures = 0
+
+        if path:
+            self._load()
+
+    @staticmethod
+    def _key(language: str, difficulty: str) -> Tuple[str, str]:
+        return language.lower(), difficulty.lower()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable exercise pool {self.path}: {str(e)}")
+            return
+        for name, exercises in saved.get("pools", {}).items():
+            key = tuple(name.split("|", 1))
+            self._pools[key] = [e for e in map(validate_exercise, exercises) if e is not None]
+        for name, fingerprints in saved.get("served", {}).items():
+            self._served[tuple(name.split("|", 1))] = dict.fromkeys(fingerprints)
+
+    def _save(self) -> None:
+        """Atomically replace the pool file (call with the lock held)."""
+        if not self.path:
+            return
+        saved = {
+            "pools": {"|".join(key): exercises for key, exercises in self._pools.items()},
+            "served": {"|".join(key): list(fingerprints) for key, fingerprints in self._served.items()}
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(saved, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save exercise pool to {self.path}: {str(e)}")
+
+    def available(self, language: str, difficulty: str) -> int:
+        """Number of exercises in stock for a pool."""
+        return len(self._pools.get(self._key(language, difficulty), []))
+
+    def take(self, language: str, difficulty: str, count: int = 3) -> List[Dict[str, str]]:
+        """
+        Serve up to count exercises from stock without waiting for the LLM.
+
+        Served exercises are never stocked again. A refill is started when
+        the stock falls below refill_below.
+
+        Returns:
+            Between 0 and count exercises; fewer while the first refill of a
+            pool is still running
+        """
+        key = self._key(language, difficulty)
+        with self._lock:
+            pool = self._pools.setdefault(key, [])
+            taken, pool[:] = pool[:count], pool[count:]
+            served = self._served.setdefault(key, {})
+            for exercise in taken:
+                served[_fingerprint(exercise)] = None
+            while len(served) > MAX_SERVED:
+                del served[next(iter(served))]
+            self.served += len(taken)
+            if taken:
+                self._save()
+        self._maybe_refill(key)
+        return taken
+
+    def prefetch(self, language: str, difficulty: str) -> None:
+        """Start filling a pool ahead of its first take()."""
+        self._maybe_refill(self._key(language, difficulty))
+
+    def _maybe_refill(self, key: Tuple[str, str]) -> None:
+        with self._lock:
+            if key in self._refilling or len(self._pools.get(key, [])) >= self.refill_below:
+                return
+            self._refilling.add(key)
+        self._executor.submit(self._refill, key)
+
+    def _refill(self, key: Tuple[str, str]) -> None:
+        language, difficulty = key
+        try:
+            for _ in range(self.max_attempts):
+                with self._lock:
+                    if len(self._pools.get(key, [])) >= self.target_size:
+                        return
+                try:
+                    generated = self.generate(language.title(), difficulty.title())
+                except Exception as e:
+                    with self._lock:
+                        self.failures += 1
+                    logger.error(f"Error generating {difficulty} {language} exercises: {str(e)}")
+                    continue
+                self._stock(key, generated or [])
+        finally:
+            with self._lock:
+                self._refilling.discard(key)
+
+    def _stock(self, key: Tuple[str, str], generated: List) -> None:
+        with self._lock:
+            pool = self._pools.setdefault(key, [])
+            seen = set(self._served.get(key, {}))
+            seen.update(_fingerprint(exercise) for exercise in pool)
+            added = 0
+            for item in generated:
+                exercise = validate_exercise(item)
+                if exercise is None:
+                    self.invalid += 1
+                    continue
+                fingerprint = _fingerprint(exercise)
+                if fingerprint in seen:
+                    self.duplicates += 1
+                    continue
+                seen.add(fingerprint)
+                pool.append(exercise)
+                added += 1
+            self.generated += added
+            if added:
+                self._save()
+
+    def stats(self) -> Dict[str, object]:
+        """Return stock per pool and the generation counters."""
+        with self._lock:
+            return {
+                "pools": {"|".join(key): len(pool) for key, pool in self._pools.items()},
+                "refilling": sorted("|".join(key) for key in self._refilling),
+                "served": self.served,
+                "generated": self.generated,
+                "invalid": self.invalid,
+                "duplicates": self.duplicates,
+                "failures": self.failures
+            }
+
+    def close(self) -> None:
+        """Wait for running refills to finish."""
+        self._executor.shutdown(wait=True)
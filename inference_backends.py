@@ -0,0 +1,297 @@
+"""
+CPU inference backends for the sequence classifiers in deep_learning.py.
+
+Usage:
+    # Export a model to ONNX (optionally with an INT8-quantized copy)
+    python inference_backends.py export --model nlptown/bert-base-multilingual-uncased-sentiment \\
+        --out models/sentiment-onnx --quantize
+
+    # Compare a backend against the fp32 PyTorch baseline
+    python inference_backends.py parity --model nlptown/bert-base-multilingual-uncased-sentiment --backend int8
+    python inference_backends.py parity --model nlptown/bert-base-multilingual-uncased-sentiment \\
+        --backend onnx --onnx-path models/sentiment-onnx/model.onnx
+
+    # Same checks fully offline, against a small randomly initialised BERT
+    python inference_backends.py parity --tiny --backend int8
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import torch
+import transformers
+
+from synthetic_reviews import generate_reviews, vocabulary
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("torch", "int8", "onnx")
+
+
+class TorchBackend:
+    """Stock eager PyTorch inference."""
+
+    name = "torch"
+
+    def __init__(self, model: torch.nn.Module, device: Optional[torch.device] = None):
+        self.device = device or torch.device("cpu")
+        self.model = model.to(self.device)
+        self.model.eval()
+
+    def __call__(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """Run the model on tokenized inputs and return the logits."""
+        with torch.no_grad():
+            return self.model(**inputs).logits
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """PyTorch with dynamic INT8 quantization of the linear layers (CPU only)."""
+
+    name = "int8"
+
+    def __init__(self, model: torch.nn.Module, device: Optional[torch.device] = None):
+        # Quantize a copy so the caller's fp32 model is left untouched
+        model = copy.deepcopy(model).to("cpu").eval()
+        quantized = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        super().__init__(quantized, torch.device("cpu"))
+
+
+class OnnxBackend:
+    """ONNX Runtime inference of a model exported with ``export_onnx``."""
+
+    name = "onnx"
+
+    def __init__(self, onnx_path: str, num_threads: Optional[int] = None):
+        try:
+            import onnxruntime
+        except ImportError as e:
+            raise ImportError("The onnx backend requires onnxruntime: pip install onnxruntime") from e
+
+        options = onnxruntime.SessionOptions()
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.device = torch.device("cpu")
+        self.session = onnxruntime.InferenceSession(onnx_path, options, providers=["CPUExecutionProvider"])
+        self.input_names = [i.name for i in self.session.get_inputs()]
+
+    def __call__(self, inputs: Dict[str, torch.Tensor]) -> torch.Tensor:
+        """Run the session on tokenized inputs and return the logits."""
+        feed = {name: inputs[name].cpu().numpy() for name in self.input_names if name in inputs}
+        logits = self.session.run(["logits"], feed)[0]
+        return torch.from_numpy(logits)
+
+
+def create_backend(kind: str, model: Optional[torch.nn.Module] = None,
+                   device: Optional[torch.device] = None,
+                   onnx_path: Optional[str] = None):
+    """
+    Build an inference backend.
+
+    Args:
+        kind: One of "torch", "int8" or "onnx"
+        model: Loaded PyTorch model (required for "torch" and "int8")
+        device: Device for the "torch" backend; the others always run on CPU
+        onnx_path: Exported model file (required for "onnx")
+
+    Returns:
+        Callable mapping tokenized inputs to logits
+    """
+    if kind == "torch":
+        return TorchBackend(model, device)
+    if kind == "int8":
+        return QuantizedTorchBackend(model)
+    if kind == "onnx":
+        if not onnx_path:
+            raise ValueError("The onnx backend needs onnx_path; create one with `python inference_backends.py export`")
+        return OnnxBackend(onnx_path)
+    raise ValueError(f"Unknown inference backend {kind!r}, expected one of {BACKENDS}")
+
+
+class _LogitsOnly(torch.nn.Module):
+    """Positional-argument wrapper so the exported graph takes named tensors and returns logits."""
+
+    def __init__(self, model: torch.nn.Module, input_names: List[str]):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *tensors):
+        return self.model(**dict(zip(self.input_names, tensors))).logits
+
+
+def export_onnx(model_name_or_path: str, out_dir: str, quantize: bool = False, opset: int = 17) -> Dict[str, str]:
+    """
+    Export a sequence classifier to ONNX with dynamic batch and sequence axes.
+
+    Args:
+        model_name_or_path: Hugging Face model id or local directory
+        out_dir: Directory to write model.onnx (and model.int8.onnx) to
+        quantize: Also write a dynamically INT8-quantized copy
+        opset: ONNX opset version
+
+    Returns:
+        Dictionary of the written file paths
+    """
+    tokenizer = transformers.AutoTokenizer.from_pretrained(model_name_or_path)
+    model = transformers.AutoModelForSequenceClassification.from_pretrained(model_name_or_path).eval()
+    os.makedirs(out_dir, exist_ok=True)
+
+    dummy = tokenizer(["an example travel review", "short"], return_tensors="pt", padding=True)
+    input_names = list(dummy.keys())
+    paths = {"onnx": os.path.join(out_dir, "model.onnx")}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            _LogitsOnly(model, input_names),
+            tuple(dummy[name] for name in input_names),
+            paths["onnx"],
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes={**{name: {0: "batch", 1: "sequence"} for name in input_names},
+                          "logits": {0: "batch"}},
+            opset_version=opset
+        )
+    tokenizer.save_pretrained(out_dir)
+    model.config.save_pretrained(out_dir)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        paths["onnx_int8"] = os.path.join(out_dir, "model.int8.onnx")
+        quantize_dynamic(paths["onnx"], paths["onnx_int8"], weight_type=QuantType.QInt8)
+
+    logger.info(f"Exported {model_name_or_path} to {paths}")
+    return paths
+
+
+def build_tiny_model(out_dir: Optional[str] = None, num_labels: int = 5, seed: int = 0,
+                     labels: Optional[List[str]] = None) -> str:
+    """
+    Save a small randomly initialised BERT classifier and tokenizer for offline use.
+
+    Args:
+        out_dir: Directory to save to (a temporary directory by default)
+        num_labels: Number of output classes
+        seed: Random seed for the weights
+        labels: Class names (e.g. language codes); overrides num_labels
+
+    Returns:
+        Path that can be passed to ``from_pretrained`` or the analyzers
+    """
+    out_dir = out_dir or tempfile.mkdtemp(prefix="tiny-bert-")
+    os.makedirs(out_dir, exist_ok=True)
+
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + vocabulary()
+    vocab += [c for c in "abcdefghijklmnopqrstuvwxyz0123456789.,!?'" if c not in vocab]
+    vocab_file = os.path.join(out_dir, "vocab.txt")
+    with open(vocab_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(vocab) + "\n")
+    transformers.BertTokenizerFast(vocab_file, do_lower_case=True).save_pretrained(out_dir)
+
+    torch.manual_seed(seed)
+    config = transformers.BertConfig(
+        vocab_size=len(vocab),
+        hidden_size=32,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=64,
+        max_position_embeddings=512,
+        num_labels=len(labels) if labels else num_labels
+    )
+    if labels:
+        config.id2label = dict(enumerate(labels))
+        config.label2id = {label: i for i, label in enumerate(labels)}
+    transformers.BertForSequenceClassification(config).save_pretrained(out_dir)
+    return out_dir
+
+
+def parity_check(model_name_or_path: str, backend: str, texts: List[str],
+                 onnx_path: Optional[str] = None, batch_size: int = 16) -> Dict[str, float]:
+    """
+    Compare a backend with the fp32 PyTorch baseline on CPU.
+
+    Returns:
+        Label agreement, largest logit difference and per-text latency of both backends
+    """
+    tokenizer = transformers.AutoTokenizer.from_pretrained(model_name_or_path)
+    model = transformers.AutoModelForSequenceClassification.from_pretrained(model_name_or_path)
+    reference = TorchBackend(model)
+    candidate = create_backend(backend, model, onnx_path=onnx_path)
+
+    batches = [
+        tokenizer(texts[i:i + batch_size], return_tensors="pt", truncation=True, max_length=512, padding=True)
+        for i in range(0, len(texts), batch_size)
+    ]
+
+    def run(fn):
+        # One warm-up batch so lazy initialisation isn't timed
+        fn(dict(batches[0]))
+        start = time.perf_counter()
+        logits = torch.cat([fn(dict(inputs)).float() for inputs in batches])
+        return logits, time.perf_counter() - start
+
+    reference_logits, reference_seconds = run(reference)
+    candidate_logits, candidate_seconds = run(candidate)
+
+    agreement = (reference_logits.argmax(-1) == candidate_logits.argmax(-1)).float().mean().item()
+    return {
+        "backend": backend,
+        "texts": len(texts),
+        "label_agreement": agreement,
+        "max_abs_logit_diff": (reference_logits - candidate_logits).abs().max().item(),
+        "reference_ms_per_text": 1000 * reference_seconds / len(texts),
+        "candidate_ms_per_text": 1000 * candidate_seconds / len(texts),
+        "speedup": reference_seconds / candidate_seconds if candidate_seconds else float("inf")
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export and validate optimized CPU inference backends")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Export a model to ONNX")
+    export_parser.add_argument("--model", help="Model id or local directory")
+    export_parser.add_argument("--tiny", action="store_true", help="Use a small random BERT instead of --model")
+    export_parser.add_argument("--out", required=True, help="Output directory")
+    export_parser.add_argument("--quantize", action="store_true", help="Also write an INT8-quantized ONNX model")
+
+    parity_parser = subparsers.add_parser("parity", help="Compare a backend with the fp32 baseline")
+    parity_parser.add_argument("--model", help="Model id or local directory")
+    parity_parser.add_argument("--tiny", action="store_true", help="Use a small random BERT instead of --model")
+    parity_parser.add_argument("--backend", choices=BACKENDS, default="int8")
+    parity_parser.add_argument("--onnx-path", help="Exported model for the onnx backend")
+    parity_parser.add_argument("--texts", help="File with one text per line (synthetic reviews by default)")
+    parity_parser.add_argument("--samples", type=int, default=256, help="Number of synthetic reviews")
+    parity_parser.add_argument("--batch-size", type=int, default=16)
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if not args.tiny and not args.model:
+        parser.error("either --model or --tiny is required")
+    model = build_tiny_model() if args.tiny else args.model
+
+    if args.command == "export":
+        print(json.dumps(export_onnx(model, args.out, quantize=args.quantize), indent=2))
+        return
+
+    onnx_path = args.onnx_path
+    if args.backend == "onnx" and not onnx_path:
+        onnx_path = export_onnx(model, tempfile.mkdtemp(prefix="onnx-export-"))["onnx"]
+
+    if args.texts:
+        with open(args.texts, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        texts = generate_reviews(args.samples)
+
+    print(json.dumps(parity_check(model, args.backend, texts, onnx_path, args.batch_size), indent=2))
+
+
+if __name__ == "__main__":
+    main()
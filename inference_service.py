@@ -0,0 +1,447 @@
+"""
+Headless HTTP service running the classifiers for any number of UI processes.
+
+Each Streamlit process normally loads its own copy of BERT. With the
+service, one process holds the sentiment analyzer and the language detector,
+and the UI replicas call it over HTTP (set INFERENCE_SERVICE_URL). Requests
+from every replica go through one MicroBatcher per model, so they share
+forward passes. The number of texts waiting for a model is bounded. Past
+that bound the service answers 503 with Retry-After instead of queueing
+without limit, and InferenceClient waits and retries.
+
+Endpoints (JSON bodies):
+    POST /v1/sentiment/analyze        {"text", "include_aspects"} -> result
+    POST /v1/sentiment/analyze_batch  {"texts", "include_aspects"} -> {"results"}
+    POST /v1/language/detect          {"text"} -> result
+    POST /v1/language/detect_batch    {"texts"} -> {"results"}
+    POST /v1/travel/respond           {"question"} -> {"response"}
+    GET  /healthz                     liveness and queue depth
+    GET  /stats                       batcher and detector stats
+    GET  /metrics                     Prometheus text (see instrumentation.py)
+
+Usage:
+    python inference_service.py --port 8600 --max-pending 256
+    INFERENCE_SERVICE_URL=http://127.0.0.1:8600 streamlit run app.py
+"""
+import argparse
+import json
+import logging
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+import httpx
+
+from instrumentation import get_instrumentation
+from micro_batcher import MicroBatcher
+
+logger = logging.getLogger(__name__)
+
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+
+class _DetectionAdapter:
+    """Gives LanguageDetector the analyze_batch interface MicroBatcher dispatches to."""
+
+    def __init__(self, detector):
+        self.detector = detector
+
+    def analyze_batch(self, texts: List[str], include_aspects: bool = False,
+                      show_progress: bool = False) -> List[Dict[str, Union[str, float]]]:
+        return self.detector.detect_batch(texts)
+
+
+class InferenceService:
+    """Batches sentiment and language requests and bounds the work waiting for the models."""
+
+    def __init__(self, analyzer, detector, travel_response: Callable[[str], str],
+                 max_batch_size: int = 32, max_wait_ms: float = 10.0,
+                 max_pending: int = 256, request_timeout: float = 60.0, retry_after: int = 1):
+        """
+        Args:
+            analyzer: SentimentAnalyzer (or anything with its analyze_batch)
+            detector: LanguageDetector
+            travel_response: Answers a travel question, e.g. IntentRouter.respond
+            max_batch_size: Maximum texts per model call
+            max_wait_ms: Longest a text waits for others to join its batch
+            max_pending: Texts allowed to wait for a model before requests are refused
+            request_timeout: Seconds a request waits for its results
+            retry_after: Seconds a refused client is told to wait (Retry-After)
+        """
+        self.travel_response = travel_response
+        self.detector = detector
+        self.max_pending = max_pending
+        self.request_timeout = request_timeout
+        self.retry_after = retry_after
+        self.sentiment_batcher = MicroBatcher(analyzer, max_batch_size, max_wait_ms)
+        self.language_batcher = MicroBatcher(_DetectionAdapter(detector), max_batch_size, max_wait_ms)
+        self.started_at = time.monotonic()
+
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.timeouts = 0
+
+        get_instrumentation().register_collector("inference_service", self.stats)
+
+    def _admit(self, count: int) -> bool:
+        """Reserve room for count texts; a lone request is always admitted, however large."""
+        with self._lock:
+            if self.pending and self.pending + count > self.max_pending:
+                self.rejected += 1
+                return False
+            self.pending += count
+            self.accepted += 1
+            return True
+
+    def _release(self, _future=None) -> None:
+        with self._lock:
+            self.pending -= 1
+
+    def run(self, batcher: MicroBatcher, texts: List[str],
+            include_aspects: bool = False) -> Optional[List[Dict]]:
+        """
+        Queue texts on a batcher and wait for their results.
+
+        Returns:
+            One result per text, or None when the service is too busy to accept them
+
+        Raises:
+            TimeoutError: The results took longer than request_timeout
+        """
+        if not self._admit(len(texts)):
+            return None
+        futures = []
+        try:
+            for text in texts:
+                future = batcher.submit(text, include_aspects)
+                # Room is given back as each text finishes, even if the caller has timed out
+                future.add_done_callback(self._release)
+                futures.append(future)
+        finally:
+            with self._lock:
+                self.pending -= len(texts) - len(futures)
+
+        deadline = time.monotonic() + self.request_timeout
+        try:
+            return [future.result(max(0.0, deadline - time.monotonic())) for future in futures]
+        except FutureTimeoutError:
+            with self._lock:
+                self.timeouts += 1
+            raise TimeoutError(f"No result within {self.request_timeout}s")
+
+    def health(self) -> Dict[str, Union[str, int, float]]:
+        return {
+            "status": "ok",
+            "uptime_seconds": time.monotonic() - self.started_at,
+            "pending": self.pending,
+            "max_pending": self.max_pending
+        }
+
+    def stats(self) -> Dict[str, Union[int, float, Dict]]:
+        """Return admission counters and the batchers' and detector's stats."""
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "timeouts": self.timeouts,
+            "sentiment_batcher": self.sentiment_batcher.stats(),
+            "language_batcher": self.language_batcher.stats(),
+            "language_detector": self.detector.stats()
+        }
+
+    def close(self) -> None:
+        """Finish the queued requests and stop the batchers."""
+        self.sentiment_batcher.close()
+        self.language_batcher.close()
+
+
+class InferenceServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], service: InferenceService):
+        super().__init__(address, _Handler)
+        self.service = service
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: InferenceServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        service = self.server.service
+        path = self.path.split("?")[0].rstrip("/")
+        if path == "/healthz":
+            self._send_json(200, service.health())
+        elif path == "/stats":
+            self._send_json(200, service.stats())
+        elif path == "/metrics":
+            body = get_instrumentation().prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _read_json(self) -> Optional[Dict]:
+        length = int(self.headers.get("Content-Length", 0))
+        if length > MAX_BODY_BYTES:
+            self._send_json(413, {"error": f"request body over {MAX_BODY_BYTES} bytes"})
+            return None
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError as e:
+            self._send_json(400, {"error": f"invalid JSON: {str(e)}"})
+            return None
+        if not isinstance(request, dict):
+            self._send_json(400, {"error": "request body must be a JSON object"})
+            return None
+        return request
+
+    def _texts(self, request: Dict, batch: bool) -> Optional[List[str]]:
+        texts = request.get("texts") if batch else [request.get("text")]
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            field = "texts must be a list of strings" if batch else "text must be a string"
+            self._send_json(400, {"error": field})
+            return None
+        return texts
+
+    def do_POST(self):
+        service = self.server.service
+        path = self.path.split("?")[0].rstrip("/")
+        routes = {
+            "/v1/sentiment/analyze": (service.sentiment_batcher, False),
+            "/v1/sentiment/analyze_batch": (service.sentiment_batcher, True),
+            "/v1/language/detect": (service.language_batcher, False),
+            "/v1/language/detect_batch": (service.language_batcher, True)
+        }
+        if path != "/v1/travel/respond" and path not in routes:
+            self._send_json(404, {"error": "not found"})
+            return
+        request = self._read_json()
+        if request is None:
+            return
+
+        if path == "/v1/travel/respond":
+            question = request.get("question")
+            if not isinstance(question, str):
+                self._send_json(400, {"error": "question must be a string"})
+                return
+            self._send_json(200, {"response": service.travel_response(question)})
+            return
+
+        batcher, batch = routes[path]
+        texts = self._texts(request, batch)
+        if texts is None:
+            return
+        try:
+            results = service.run(batcher, texts, bool(request.get("include_aspects", False)))
+        except TimeoutError as e:
+            self._send_json(504, {"error": str(e)})
+            return
+        except Exception as e:
+            logger.error(f"Error serving {path}: {str(e)}")
+            self._send_json(500, {"error": str(e)})
+            return
+        if results is None:
+            self._send_json(503, {"error": "service busy"}, {"Retry-After": str(service.retry_after)})
+            return
+        self._send_json(200, {"results": results} if batch else results[0])
+
+
+def start_inference_server(service: InferenceService, port: int = 0, host: str = "127.0.0.1") -> InferenceServer:
+    """
+    Serve an InferenceService on a background thread.
+
+    Args:
+        service: Service to expose
+        port: Port to listen on (0 picks a free one)
+        host: Interface to bind
+
+    Returns:
+        The running server; its ``base_url`` goes into InferenceClient
+    """
+    server = InferenceServer((host, port), service)
+    threading.Thread(target=server.serve_forever, name="inference-server", daemon=True).start()
+    return server
+
+
+class InferenceServiceError(RuntimeError):
+    """The inference service could not be reached or refused the request."""
+
+
+class InferenceClient:
+    """
+    Client for the inference service with the analyzers' interfaces.
+
+    ``analyze``/``analyze_batch`` match SentimentAnalyzer and ``detect``/
+    ``detect_batch``/``stats`` match LanguageDetector, so the client can stand
+    in for either, e.g. as a SentimentCascade's fallback model. Failures are
+    reported as ``{"error": ...}`` results, as the analyzers do.
+    """
+
+    def __init__(self, base_url: str, timeout: float = 60.0, max_retries: int = 3,
+                 max_retry_wait: float = 5.0):
+        """
+        Args:
+            base_url: Service address, e.g. http://127.0.0.1:8600
+            timeout: Per-request timeout in seconds
+            max_retries: Retries of a request refused with 503 (service busy)
+            max_retry_wait: Longest wait before a retry, whatever Retry-After says
+        """
+        self.base_url = base_url.rstrip("/")
+        self.max_retries = max_retries
+        self.max_retry_wait = max_retry_wait
+        # One pooled connection set shared by every session of this process
+        self._client = httpx.Client(base_url=self.base_url, timeout=timeout)
+        self.busy_retries = 0
+
+    def _request(self, method: str, path: str, payload: Optional[Dict] = None) -> Dict:
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self._client.request(method, path, json=payload)
+            except httpx.HTTPError as e:
+                raise InferenceServiceError(f"{self.base_url}{path}: {str(e)}") from e
+            if response.status_code == 503 and attempt < self.max_retries:
+                self.busy_retries += 1
+                try:
+                    wait = float(response.headers.get("Retry-After", "1"))
+                except ValueError:
+                    wait = 1.0
+                time.sleep(min(wait, self.max_retry_wait))
+                continue
+            if response.status_code != 200:
+                try:
+                    message = response.json().get("error", response.text)
+                except ValueError:
+                    message = response.text
+                raise InferenceServiceError(f"{self.base_url}{path}: HTTP {response.status_code}: {message}")
+            return response.json()
+        raise InferenceServiceError(f"{self.base_url}{path}: still busy after {self.max_retries} retries")
+
+    def analyze(self, text: str, include_aspects: bool = False) -> Dict[str, Union[str, float, Dict]]:
+        """Sentiment of one text, as SentimentAnalyzer.analyze returns it."""
+        try:
+            return self._request("POST", "/v1/sentiment/analyze",
+                                 {"text": text, "include_aspects": include_aspects})
+        except InferenceServiceError as e:
+            logger.error(f"Error in sentiment analysis: {str(e)}")
+            return {"error": str(e)}
+
+    def analyze_batch(self, texts: List[str], include_aspects: bool = False,
+                      show_progress: bool = False, **kwargs) -> List[Dict[str, Union[str, float, Dict]]]:
+        """
+        Sentiment of several texts in one request.
+
+        show_progress and batching arguments are accepted for interface
+        compatibility and ignored; the service batches on its side.
+        """
+        try:
+            return self._request("POST", "/v1/sentiment/analyze_batch",
+                                 {"texts": list(texts), "include_aspects": include_aspects})["results"]
+        except InferenceServiceError as e:
+            logger.error(f"Error in batch sentiment analysis: {str(e)}")
+            return [{"error": str(e)}]
+
+    def detect(self, text: str) -> Dict[str, Union[str, float]]:
+        """Language of one text, as LanguageDetector.detect returns it."""
+        try:
+            return self._request("POST", "/v1/language/detect", {"text": text})
+        except InferenceServiceError as e:
+            logger.error(f"Error in language detection: {str(e)}")
+            return {"error": str(e)}
+
+    def detect_batch(self, texts: List[str], **kwargs) -> List[Dict[str, Union[str, float]]]:
+        """Languages of several texts in one request."""
+        try:
+            return self._request("POST", "/v1/language/detect_batch", {"texts": list(texts)})["results"]
+        except InferenceServiceError as e:
+            logger.error(f"Error in language detection: {str(e)}")
+            return [{"error": str(e)} for _ in texts]
+
+    def travel_response(self, question: str) -> str:
+        """The service's canned answer to a travel question."""
+        return self._request("POST", "/v1/travel/respond", {"question": question})["response"]
+
+    def health(self) -> Dict:
+        return self._request("GET", "/healthz")
+
+    def stats(self) -> Dict:
+        """The service's stats, with this client's busy retries."""
+        return {**self._request("GET", "/stats"), "client_busy_retries": self.busy_retries}
+
+    def close(self) -> None:
+        self._client.close()
+
+
+def build_service(max_pending: int = 256, request_timeout: float = 60.0) -> InferenceService:
+    """Load the models and content pack configured in config.py into a service."""
+    from config import (SENTIMENT_CACHE_PATH, SENTIMENT_CACHE_MAX_ENTRIES, SENTIMENT_MAX_BATCH_SIZE,
+                        SENTIMENT_MAX_WAIT_MS, SENTIMENT_MODEL, LANGUAGE_MODEL, INFERENCE_BACKEND,
+                        SENTIMENT_ONNX_PATH, LANGUAGE_ONNX_PATH, WINDOW_OVERLAP, WINDOW_AGGREGATION)
+    from content_pack import get_content_pack
+    from deep_learning import LanguageDetector, SentimentAnalyzer
+    from disk_cache import DiskCache
+    from intent_router import IntentRouter
+
+    cache = DiskCache(SENTIMENT_CACHE_PATH, SENTIMENT_CACHE_MAX_ENTRIES) if SENTIMENT_CACHE_PATH else None
+    analyzer = SentimentAnalyzer(SENTIMENT_MODEL, cache=cache, backend=INFERENCE_BACKEND,
+                                 onnx_path=SENTIMENT_ONNX_PATH, window_overlap=WINDOW_OVERLAP,
+                                 aggregation=WINDOW_AGGREGATION)
+    detector = LanguageDetector(LANGUAGE_MODEL, backend=INFERENCE_BACKEND, onnx_path=LANGUAGE_ONNX_PATH,
+                                window_overlap=WINDOW_OVERLAP, aggregation=WINDOW_AGGREGATION)
+    pack = get_content_pack()
+    router = IntentRouter(pack.destinations, pack.travel_responses(), pack.default_travel_response())
+    return InferenceService(analyzer, detector, router.respond,
+                            max_batch_size=SENTIMENT_MAX_BATCH_SIZE, max_wait_ms=SENTIMENT_MAX_WAIT_MS,
+                            max_pending=max_pending, request_timeout=request_timeout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the sentiment and language models over HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (0.0.0.0 for other hosts)")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--max-pending", type=int, default=256,
+                        help="Texts allowed to wait for a model before requests get 503")
+    parser.add_argument("--request-timeout", type=float, default=60.0, help="Seconds a request waits for results")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    service = build_service(args.max_pending, args.request_timeout)
+    server = InferenceServer((args.host, args.port), service)
+    print(f"Inference service listening on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""
+Per-stage latency histograms for the analyzers, exported in Prometheus format.
+
+The analyzers wrap each stage of a model call (tokenize, transfer, forward,
+softmax, postprocess, results) in ``get_instrumentation().time(component, stage)``.
+When instrumentation is disabled that returns a shared no-op context
+manager, so the cost is one attribute check per stage per batch. Other
+components (the cascade, the language detector, the LLM client) can
+register collectors whose numeric stats are exported as gauges next to
+the histograms.
+
+Usage:
+    # Serve /metrics from a process that has run some analyses
+    INSTRUMENTATION_ENABLED=1 METRICS_PORT=9464 streamlit run app.py
+    curl http://127.0.0.1:9464/metrics
+"""
+import bisect
+import logging
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+METRIC_PREFIX = "travel_assistant"
+# postprocess turns probabilities into labels; results builds the result dictionaries and caches them
+STAGES = ("tokenize", "transfer", "forward", "softmax", "postprocess", "results")
+
+# Upper bounds in seconds, from sub-millisecond tokenization to multi-second batches
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram."""
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float) -> None:
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += seconds
+
+    def quantile(self, fraction: float) -> float:
+        """Estimate a quantile by interpolating inside its bucket, as Prometheus does."""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            target = fraction * self.count
+            seen, lower = 0, 0.0
+            for bound, count in zip(self.buckets, self.counts):
+                if count and seen + count >= target:
+                    return lower + (bound - lower) * (target - seen) / count
+                seen += count
+                lower = bound
+        # Beyond the last bucket: its bound is the best available estimate
+        return self.buckets[-1]
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(le, cumulative count) pairs, ending with +Inf."""
+        with self._lock:
+            rows, seen = [], 0
+            for bound, count in zip(self.buckets, self.counts):
+                seen += count
+                rows.append((repr(bound), seen))
+            rows.append(("+Inf", self.count))
+            return rows
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: Histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.start)
+        return False
+
+
+def _flatten(stats: Dict, prefix: str = "") -> Dict[str, float]:
+    """Numeric leaves of a nested stats dictionary, with keys joined by underscores."""
+    flat = {}
+    for key, value in stats.items():
+        name = f"{prefix}_{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(_flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def _metric_name(*parts: str) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]", "_", "_".join(parts))
+
+
+class Instrumentation:
+    """Stage histograms per component plus registered stats collectors."""
+
+    def __init__(self, enabled: bool = False, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """
+        Args:
+            enabled: Record stage timings; when False, time() is a no-op
+            buckets: Histogram bucket upper bounds in seconds
+        """
+        self.enabled = enabled
+        self.buckets = buckets
+        self._histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._collectors: Dict[str, Callable[[], Dict]] = {}
+        self._lock = threading.Lock()
+
+    def _histogram(self, component: str, stage: str) -> Histogram:
+        histogram = self._histograms.get((component, stage))
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault((component, stage), Histogram(self.buckets))
+        return histogram
+
+    def time(self, component: str, stage: str):
+        """
+        Context manager timing one stage.
+
+        Args:
+            component: Instrumented object, e.g. "sentiment" or "language"
+            stage: One of STAGES (any name is accepted)
+        """
+        if not self.enabled:
+            return NULL_TIMER
+        return _StageTimer(self._histogram(component, stage))
+
+    def observe(self, component: str, stage: str, seconds: float) -> None:
+        """Record a duration measured elsewhere."""
+        if self.enabled:
+            self._histogram(component, stage).observe(seconds)
+
+    def register_collector(self, name: str, collect: Callable[[], Dict]) -> None:
+        """
+        Export the numeric values of collect() as gauges named after name.
+
+        Registering the same name again replaces the earlier collector.
+        """
+        with self._lock:
+            self._collectors[name] = collect
+
+    def _sorted_histograms(self) -> List[Tuple[Tuple[str, str], Histogram]]:
+        with self._lock:
+            return sorted(self._histograms.items(), key=lambda item: item[0])
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """Stage latency summaries (milliseconds) per component, and the collectors' stats."""
+        stages: Dict[str, Dict] = {}
+        for (component, stage), histogram in self._sorted_histograms():
+            stages.setdefault(component, {})[stage] = {
+                "count": histogram.count,
+                "mean_ms": 1000 * histogram.sum / histogram.count if histogram.count else 0.0,
+                "p50_ms": 1000 * histogram.quantile(0.50),
+                "p95_ms": 1000 * histogram.quantile(0.95),
+                "p99_ms": 1000 * histogram.quantile(0.99)
+            }
+        return {"enabled": self.enabled, "stages": stages, "collectors": self._collect()}
+
+    def _collect(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            collectors = list(self._collectors.items())
+        collected = {}
+        for name, collect in collectors:
+            try:
+                collected[name] = _flatten(collect())
+            except Exception as e:
+                logger.warning(f"Metrics collector {name} failed: {str(e)}")
+        return collected
+
+    def prometheus_text(self) -> str:
+        """Render every histogram and collector in the Prometheus text exposition format."""
+        name = f"{METRIC_PREFIX}_stage_seconds"
+        lines = [f"# HELP {name} Time spent in each stage of a model call",
+                 f"# TYPE {name} histogram"]
+        for (component, stage), histogram in self._sorted_histograms():
+            labels = f'component="{component}",stage="{stage}"'
+            for le, count in histogram.cumulative():
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {count}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        for collector, values in self._collect().items():
+            for key, value in sorted(values.items()):
+                gauge = _metric_name(METRIC_PREFIX, collector, key)
+                lines.append(f"# TYPE {gauge} gauge")
+                lines.append(f"{gauge} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    server: "MetricsServer"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split("?")[0].rstrip("/") not in ("/metrics", ""):
+            self.send_error(404)
+            return
+        body = self.server.instrumentation.prometheus_text().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class MetricsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], instrumentation: "Instrumentation"):
+        super().__init__(address, _MetricsHandler)
+        self.instrumentation = instrumentation
+
+
+def serve_metrics(port: int = 0, host: str = "127.0.0.1",
+                  instrumentation: Optional[Instrumentation] = None) -> MetricsServer:
+    """
+    Serve /metrics on a background thread.
+
+    Args:
+        port: Port to listen on (0 picks a free one)
+        host: Interface to bind; local only by default
+        instrumentation: Metrics to serve (the shared instance by default)
+    """
+    server = MetricsServer((host, port), instrumentation or get_instrumentation())
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+_instrumentation: Optional[Instrumentation] = None
+_instrumentation_lock = threading.Lock()
+
+
+def get_instrumentation() -> Instrumentation:
+    """Return the process-wide instance, enabled by INSTRUMENTATION_ENABLED in config.py."""
+    global _instrumentation
+    if _instrumentation is None:
+        with _instrumentation_lock:
+            if _instrumentation is None:
+                from config import INSTRUMENTATION_ENABLED
+                _instrumentation = Instrumentation(INSTRUMENTATION_ENABLED)
+    return _instrumentation
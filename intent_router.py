@@ -0,0 +1,268 @@
+"""
+Keyword intent routing for the travel assistant.
+
+All destination names and topic keywords are compiled once into an
+Aho-Corasick automaton, so a question is scanned a single time no matter
+how many destinations or keywords are configured. Keywords match anywhere
+in the lower-cased text, like the substring checks they replace.
+
+Usage:
+    # Time routing with thousands of synthetic destinations
+    python intent_router.py --destinations 5000 --queries 20000
+"""
+import argparse
+import json
+import random
+import time
+from collections import deque
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+# Destination questions: the first facet with a matching keyword picks the answer
+DESTINATION_FACETS: List[Tuple[str, Tuple[str, ...]]] = [
+    ("famous_places", ("famous", "place", "destination")),
+    ("budget", ("budget", "cost", "money")),
+    ("tips", ("tip", "advice"))
+]
+
+# General topics, checked in order; a rule matches when every one of its
+# keyword groups has at least one hit
+TOPIC_RULES: List[Tuple[str, Tuple[Tuple[str, ...], ...]]] = [
+    ("newzealand", (("enough",), ("newzealand", "new zealand"))),
+    ("cheap", (("cheap", "budget", "affordable", "save money"),)),
+    ("weather", (("weather",),)),
+    ("packing", (("pack", "bring"),)),
+    ("safety", (("safe", "security"),)),
+    ("transportation", (("transport", "travel", "get around", "bus", "train"),)),
+    ("accommodation", (("hotel", "stay", "hostel", "accommodation", "airbnb"),)),
+    ("culture", (("culture", "custom", "tradition", "etiquette"),))
+]
+
+MISSING_TIPS = "Travel tips coming soon for this destination!"
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton reporting every keyword that occurs in a text."""
+
+    def __init__(self, keywords: Iterable[str]):
+        # Trie as parallel lists indexed by state; state 0 is the root
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[str, ...]] = [()]
+
+        for keyword in set(keywords):
+            if not keyword:
+                continue
+            state = 0
+            for char in keyword:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            self._output[state] = (keyword,)
+
+        # Breadth-first pass setting failure links and merging the outputs
+        # reachable through them, so matching never has to walk the chain
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def __len__(self) -> int:
+        """Number of trie states."""
+        return len(self._goto)
+
+    def find_all(self, text: str) -> Set[str]:
+        """
+        Return the set of keywords occurring in text.
+
+        Args:
+            text: Text to scan (matching is case-sensitive)
+
+        Returns:
+            Every keyword found, including overlapping ones
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+class Route(NamedTuple):
+    """Outcome of routing a question."""
+    intent: str
+    destination: Optional[str] = None
+
+
+class IntentRouter:
+    """Maps a question to a canned travel answer using one precompiled automaton."""
+
+    def __init__(self, destinations: Dict[str, Dict[str, str]],
+                 responses: Dict[str, str],
+                 default_response: str,
+                 destination_facets: Sequence[Tuple[str, Sequence[str]]] = DESTINATION_FACETS,
+                 topic_rules: Sequence[Tuple[str, Sequence[Sequence[str]]]] = TOPIC_RULES):
+        """
+        Args:
+            destinations: Destination name -> facet -> answer; earlier destinations win ties
+            responses: Topic answers keyed by the names used in topic_rules
+            default_response: Answer when nothing matches
+            destination_facets: (facet, keywords) pairs in priority order
+            topic_rules: (topic, keyword groups) pairs in priority order
+        """
+        self.destinations = destinations
+        self.responses = responses
+        self.default_response = default_response
+        self.destination_facets = [(facet, frozenset(keywords)) for facet, keywords in destination_facets]
+        self.topic_rules = [(topic, [frozenset(group) for group in groups]) for topic, groups in topic_rules]
+
+        self._destination_rank = {name.lower(): rank for rank, name in enumerate(destinations)}
+        self._destination_names = list(destinations)
+
+        keywords = set(self._destination_rank)
+        for _, group in self.destination_facets:
+            keywords |= group
+        for _, groups in self.topic_rules:
+            for group in groups:
+                keywords |= group
+        self.automaton = KeywordAutomaton(keywords)
+
+    def route(self, text: str) -> Route:
+        """
+        Classify a question.
+
+        Args:
+            text: User question
+
+        Returns:
+            The matched intent (a destination facet, a topic or "default") and,
+            for destination questions, the destination name
+        """
+        hits = self.automaton.find_all(text.lower())
+        if not hits:
+            return Route("default")
+
+        # A destination only counts when the question also names a facet
+        ranks = [self._destination_rank[hit] for hit in hits if hit in self._destination_rank]
+        if ranks:
+            for facet, keywords in self.destination_facets:
+                if not hits.isdisjoint(keywords):
+                    return Route(facet, self._destination_names[min(ranks)])
+
+        for topic, groups in self.topic_rules:
+            if all(not hits.isdisjoint(group) for group in groups):
+                return Route(topic)
+        return Route("default")
+
+    def respond(self, text: str) -> str:
+        """Return the canned answer for a question."""
+        intent, destination = self.route(text)
+        if destination is not None:
+            answers = self.destinations[destination]
+            return answers.get(intent, MISSING_TIPS) if intent == "tips" else answers[intent]
+        if intent == "default":
+            return self.default_response
+        return self.responses[intent]
+
+
+def _scan_route(router: IntentRouter, text: str) -> Route:
+    """The previous linear if-chain over the same tables, kept as the benchmark baseline."""
+    lowered = text.lower()
+    for destination in router.destinations:
+        if destination in lowered:
+            for facet, keywords in router.destination_facets:
+                if any(keyword in lowered for keyword in keywords):
+                    return Route(facet, destination)
+    for topic, groups in router.topic_rules:
+        if all(any(keyword in lowered for keyword in group) for group in groups):
+            return Route(topic)
+    return Route("default")
+
+
+def _synthetic_destinations(count: int, seed: int = 0) -> Dict[str, Dict[str, str]]:
+    rng = random.Random(seed)
+    syllables = ["ka", "lo", "mi", "ra", "tu", "ve", "sa", "no", "bri", "sto", "quen", "dar", "fel", "gor", "hul"]
+    destinations = {}
+    while len(destinations) < count:
+        name = "".join(rng.choice(syllables) for _ in range(rng.randint(3, 5)))
+        destinations[name] = {"famous_places": f"Sights in {name}", "budget": f"Costs in {name}"}
+    return destinations
+
+
+def benchmark(destination_count: int, query_count: int, seed: int = 0) -> Dict:
+    """
+    Time the compiled router against the linear scan on synthetic questions.
+
+    Returns:
+        Build time and per-query latency percentiles in microseconds
+    """
+    from benchmark import percentiles_us
+
+    rng = random.Random(seed)
+    destinations = _synthetic_destinations(destination_count, seed)
+    names = list(destinations)
+    templates = [
+        "What are famous places in {d}?",
+        "How much money do I need for {d}?",
+        "Any tips for {d}?",
+        "What should I pack for my trip?",
+        "Is it safe to take the night train?",
+        "Where can I find a cheap hostel to stay in?",
+        "Tell me something about the local etiquette",
+        "Hello there, what can you do?"
+    ]
+    queries = [rng.choice(templates).format(d=rng.choice(names)) for _ in range(query_count)]
+
+    start = time.perf_counter()
+    router = IntentRouter(destinations, {topic: topic for topic, _ in TOPIC_RULES}, "default")
+    build_seconds = time.perf_counter() - start
+
+    report = {
+        "destinations": destination_count,
+        "queries": query_count,
+        "automaton_states": len(router.automaton),
+        "build_ms": 1000 * build_seconds
+    }
+    scan_queries = queries[:max(1, query_count // 10)]
+    for name, route, sample in (("router", router.route, queries),
+                                ("linear_scan", lambda q: _scan_route(router, q), scan_queries)):
+        timings = []
+        for query in sample:
+            start = time.perf_counter()
+            route(query)
+            timings.append(time.perf_counter() - start)
+        report[f"{name}_us"] = percentiles_us(timings)
+
+    mismatches = sum(router.route(q) != _scan_route(router, q) for q in scan_queries)
+    report["mismatches"] = mismatches
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the compiled intent router")
+    parser.add_argument("--destinations", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(json.dumps(benchmark(args.destinations, args.queries, args.seed), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Language identification from the Unicode script of a text.
+
+Some scripts are, in practice, written in only one language (Hangul for
+Korean, Thai, Greek, Devanagari for Hindi), and kana settles Japanese.
+For such text the script answers the question without running a
+transformer, and it also covers Korean, which the language classifier
+doesn't know. Latin, Cyrillic and Han-only text are left to the model.
+Needs only the standard library.
+"""
+from typing import Dict, Optional, Tuple
+
+# ISO 639-1 codes of the language classifier's labels (plus Korean) and their display names
+ISO_LANGUAGE_NAMES = {
+    "ar": "Arabic",
+    "bg": "Bulgarian",
+    "de": "German",
+    "el": "Greek",
+    "en": "English",
+    "es": "Spanish",
+    "fr": "French",
+    "hi": "Hindi",
+    "it": "Italian",
+    "ja": "Japanese",
+    "ko": "Korean",
+    "nl": "Dutch",
+    "pl": "Polish",
+    "pt": "Portuguese",
+    "ru": "Russian",
+    "sw": "Swahili",
+    "th": "Thai",
+    "tr": "Turkish",
+    "ur": "Urdu",
+    "vi": "Vietnamese",
+    "zh": "Chinese"
+}
+
+# (first code point, last code point, script)
+SCRIPT_RANGES = [
+    (0x0370, 0x03FF, "greek"),
+    (0x1F00, 0x1FFF, "greek"),
+    (0x0400, 0x052F, "cyrillic"),
+    (0x0600, 0x06FF, "arabic"),
+    (0x0750, 0x077F, "arabic"),
+    (0xFB50, 0xFDFF, "arabic"),
+    (0xFE70, 0xFEFF, "arabic"),
+    (0x0900, 0x097F, "devanagari"),
+    (0x0E00, 0x0E7F, "thai"),
+    (0x1100, 0x11FF, "hangul"),
+    (0x3130, 0x318F, "hangul"),
+    (0xAC00, 0xD7AF, "hangul"),
+    (0x3040, 0x309F, "kana"),
+    (0x30A0, 0x30FF, "kana"),
+    (0x31F0, 0x31FF, "kana"),
+    (0xFF66, 0xFF9F, "kana"),
+    (0x4E00, 0x9FFF, "han"),
+    (0x3400, 0x4DBF, "han"),
+    (0xF900, 0xFAFF, "han")
+]
+
+# Scripts that identify a single language on their own
+SCRIPT_LANGUAGES = {
+    "greek": "el",
+    "devanagari": "hi",
+    "thai": "th",
+    "hangul": "ko"
+}
+
+# Letters used in Urdu but not in Arabic, and letters that Persian adds to
+# the Arabic alphabet (a language the classifier doesn't know)
+URDU_LETTERS = set("ٹڈڑںھہے")
+PERSIAN_LETTERS = set("پچژگکی")
+
+
+def _script(char: str) -> Optional[str]:
+    code = ord(char)
+    if code < 0x0370:
+        return "latin" if char.isalpha() else None
+    for first, last, script in SCRIPT_RANGES:
+        if first <= code <= last:
+            return script
+    return "other" if char.isalpha() else None
+
+
+def script_counts(text: str) -> Dict[str, int]:
+    """Count the letters of text per script."""
+    counts: Dict[str, int] = {}
+    for char in text:
+        script = _script(char)
+        if script is not None:
+            counts[script] = counts.get(script, 0) + 1
+    return counts
+
+
+def detect_script_language(text: str, min_share: float = 0.6) -> Optional[Tuple[str, float]]:
+    """
+    Identify the language of text from its script when the script settles it.
+
+    Args:
+        text: Text to classify
+        min_share: Fraction of the letters that must belong to the deciding script
+
+    Returns:
+        (ISO 639-1 code, share of letters in the deciding script), or None
+        when the script is ambiguous and a model is needed
+    """
+    counts = script_counts(text)
+    total = sum(counts.values())
+    if not total:
+        return None
+
+    # Japanese mixes kana with kanji; any real share of kana rules out Chinese
+    kana = counts.get("kana", 0)
+    if kana and kana / total >= 0.1 and (kana + counts.get("han", 0)) / total >= min_share:
+        return "ja", (kana + counts.get("han", 0)) / total
+
+    script, count = max(counts.items(), key=lambda item: item[1])
+    share = count / total
+    if share < min_share:
+        return None
+    if script in SCRIPT_LANGUAGES:
+        return SCRIPT_LANGUAGES[script], share
+    if script == "arabic":
+        letters = set(text)
+        if letters & URDU_LETTERS:
+            return "ur", share
+        if letters & PERSIAN_LETTERS:
+            return None
+        return "ar", share
+    return None
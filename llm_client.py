@@ -0,0 +1,314 @@
+"""
+Shared OpenAI chat client.
+
+All requests run on one background event loop with a pooled HTTP client, a
+concurrency limit, per-call timeouts and retries with jittered exponential
+backoff. ``chat`` can be called from ordinary (e.g. Streamlit) code and
+``achat`` from any asyncio event loop; ``stream`` yields tokens as they
+arrive and stops the upstream request when the caller cancels.
+"""
+import asyncio
+import logging
+import queue
+import random
+import threading
+import time
+from collections import Counter, deque
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+import openai
+
+from instrumentation import get_instrumentation
+
+logger = logging.getLogger(__name__)
+
+# Errors worth retrying: the request may well succeed a moment later
+RETRYABLE_ERRORS = (
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError
+)
+
+
+# Marks the end of a streamed response in the token queue
+_END_OF_STREAM = object()
+
+
+class LLMMetrics:
+    """Request counters and a sliding window of latencies."""
+
+    def __init__(self, window: int = 1000):
+        self.requests = 0
+        self.successes = 0
+        self.failures = 0
+        self.retries = 0
+        self.in_flight = 0
+        self.errors = Counter()
+        self.latencies = deque(maxlen=window)
+        self.first_token_latencies = deque(maxlen=window)
+        self.cancelled = 0
+        self._lock = threading.Lock()
+
+    def record_start(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+
+    def record_retry(self, error: Exception) -> None:
+        with self._lock:
+            self.retries += 1
+            self.errors[type(error).__name__] += 1
+
+    def record_first_token(self, seconds: float) -> None:
+        with self._lock:
+            self.first_token_latencies.append(seconds)
+
+    def record_end(self, seconds: float, error: Optional[BaseException] = None) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            if isinstance(error, asyncio.CancelledError):
+                self.cancelled += 1
+            elif error is None:
+                self.successes += 1
+                self.latencies.append(seconds)
+            else:
+                self.failures += 1
+                self.errors[type(error).__name__] += 1
+
+    def snapshot(self) -> Dict:
+        """Return the counters and latency percentiles (milliseconds) of recent successful calls."""
+        from benchmark import percentiles_ms
+
+        with self._lock:
+            latencies = list(self.latencies)
+            first_token = list(self.first_token_latencies)
+            return {
+                "requests": self.requests,
+                "successes": self.successes,
+                "failures": self.failures,
+                "cancelled": self.cancelled,
+                "retries": self.retries,
+                "in_flight": self.in_flight,
+                "errors": dict(self.errors),
+                "latency_ms": percentiles_ms(latencies),
+                "time_to_first_token_ms": percentiles_ms(first_token)
+            }
+
+
+class LLMClient:
+    """Chat completion client with pooling, bounded concurrency, timeouts and retries."""
+
+    def __init__(self, api_key: str,
+                 base_url: Optional[str] = None,
+                 model: str = "gpt-3.5-turbo",
+                 timeout: float = 30.0,
+                 max_retries: int = 3,
+                 max_concurrency: int = 8,
+                 backoff_base: float = 0.5,
+                 backoff_max: float = 8.0):
+        """
+        Args:
+            api_key: OpenAI API key
+            base_url: Alternative API endpoint (e.g. the local mock server)
+            model: Default chat model
+            timeout: Default per-attempt timeout in seconds
+            max_retries: Retries after the first attempt for transient errors
+            max_concurrency: Maximum requests in flight at once
+            backoff_base: First retry delay ceiling in seconds, doubled on each retry
+            backoff_max: Largest retry delay ceiling in seconds
+        """
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.metrics = LLMMetrics()
+
+        self._loop = None
+        self._client = None
+        self._semaphore = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        # The HTTP pool is bound to one event loop, so every request runs there
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-client", daemon=True).start()
+                asyncio.run_coroutine_threadsafe(self._setup(), loop).result()
+                self._loop = loop
+            return self._loop
+
+    async def _setup(self) -> None:
+        http_client = httpx.AsyncClient(
+            limits=httpx.Limits(max_connections=self.max_concurrency,
+                                max_keepalive_connections=self.max_concurrency),
+            timeout=self.timeout
+        )
+        # Retries are handled here so they share the backoff policy and metrics
+        self._client = openai.AsyncOpenAI(api_key=self.api_key, base_url=self.base_url,
+                                          max_retries=0, http_client=http_client)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    def _backoff(self, attempt: int, error: Exception) -> float:
+        retry_after = None
+        response = getattr(error, "response", None)
+        if response is not None:
+            retry_after = response.headers.get("retry-after")
+        if retry_after:
+            try:
+                # Honour the server's hint, but never past our own ceiling
+                return max(0.0, min(float(retry_after), self.backoff_max))
+            except ValueError:
+                pass
+        # Full jitter keeps concurrent callers from retrying in lockstep
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def _create(self, messages: List[Dict[str, str]], timeout: Optional[float], **kwargs):
+        """Send a completion request, retrying transient errors. Must hold the semaphore."""
+        kwargs.setdefault("model", self.model)
+        attempt = 0
+        while True:
+            try:
+                return await self._client.chat.completions.create(
+                    messages=messages, timeout=timeout or self.timeout, **kwargs
+                )
+            except RETRYABLE_ERRORS as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt, e)
+                logger.warning(f"LLM request failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                self.metrics.record_retry(e)
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def _chat(self, messages: List[Dict[str, str]], timeout: Optional[float], **kwargs) -> str:
+        self.metrics.record_start()
+        start = time.perf_counter()
+        try:
+            async with self._semaphore:
+                response = await self._create(messages, timeout, **kwargs)
+        except BaseException as e:
+            self.metrics.record_end(time.perf_counter() - start, e)
+            raise
+        self.metrics.record_end(time.perf_counter() - start)
+        return response.choices[0].message.content
+
+    async def _stream(self, messages: List[Dict[str, str]], tokens: queue.Queue,
+                      timeout: Optional[float], **kwargs) -> None:
+        self.metrics.record_start()
+        start = time.perf_counter()
+        first_token = True
+        try:
+            async with self._semaphore:
+                # Retries only cover opening the stream, never a partly delivered answer
+                stream = await self._create(messages, timeout, stream=True, **kwargs)
+                try:
+                    async for chunk in stream:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            if first_token:
+                                self.metrics.record_first_token(time.perf_counter() - start)
+                                first_token = False
+                            tokens.put(delta)
+                finally:
+                    # Also runs on cancellation, releasing the connection mid-stream
+                    await stream.response.aclose()
+        except BaseException as e:
+            self.metrics.record_end(time.perf_counter() - start, e)
+            tokens.put(e)
+            raise
+        self.metrics.record_end(time.perf_counter() - start)
+        tokens.put(_END_OF_STREAM)
+
+    async def achat(self, messages: List[Dict[str, str]], timeout: Optional[float] = None, **kwargs) -> str:
+        """
+        Send a chat completion request from any event loop.
+
+        Args:
+            messages: Chat messages in OpenAI format
+            timeout: Per-attempt timeout in seconds (client default if omitted)
+            **kwargs: Extra completion parameters, e.g. model or temperature
+
+        Returns:
+            Content of the first choice
+        """
+        future = asyncio.run_coroutine_threadsafe(self._chat(messages, timeout, **kwargs), self._ensure_loop())
+        return await asyncio.wrap_future(future)
+
+    def chat(self, messages: List[Dict[str, str]], timeout: Optional[float] = None, **kwargs) -> str:
+        """Blocking version of ``achat``."""
+        future = asyncio.run_coroutine_threadsafe(self._chat(messages, timeout, **kwargs), self._ensure_loop())
+        return future.result()
+
+    def stream(self, messages: List[Dict[str, str]],
+               cancel_event: Optional[threading.Event] = None,
+               timeout: Optional[float] = None, **kwargs) -> Iterator[str]:
+        """
+        Stream a chat completion token by token.
+
+        The upstream request is cancelled when ``cancel_event`` is set or the
+        generator is closed early.
+
+        Args:
+            messages: Chat messages in OpenAI format
+            cancel_event: Optional event that stops the stream when set
+            timeout: Per-attempt timeout in seconds (client default if omitted)
+            **kwargs: Extra completion parameters, e.g. model or temperature
+
+        Yields:
+            Content deltas as they arrive
+        """
+        tokens = queue.Queue()
+        future = asyncio.run_coroutine_threadsafe(self._stream(messages, tokens, timeout, **kwargs),
+                                                  self._ensure_loop())
+        try:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                try:
+                    item = tokens.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is _END_OF_STREAM:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    def close(self) -> None:
+        """Close the connection pool and stop the event loop."""
+        with self._start_lock:
+            if self._loop is None:
+                return
+            asyncio.run_coroutine_threadsafe(self._client.close(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
+
+
+_default_client = None
+_default_client_lock = threading.Lock()
+
+
+def get_client() -> LLMClient:
+    """Return the process-wide client configured from config.py."""
+    global _default_client
+    with _default_client_lock:
+        if _default_client is None:
+            from config import (OPENAI_API_KEY, OPENAI_BASE_URL, LLM_MODEL, LLM_TIMEOUT,
+                                LLM_MAX_RETRIES, LLM_MAX_CONCURRENCY)
+            _default_client = LLMClient(OPENAI_API_KEY,
+                                        base_url=OPENAI_BASE_URL,
+                                        model=LLM_MODEL,
+                                        timeout=LLM_TIMEOUT,
+                                        max_retries=LLM_MAX_RETRIES,
+                                        max_concurrency=LLM_MAX_CONCURRENCY)
+            get_instrumentation().register_collector("llm", _default_client.metrics.snapshot)
+        return _default_client
@@ -0,0 +1,176 @@
+import logging
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+
+def expand_batch_errors(results: List[Dict], n: int) -> List[Dict]:
+    """
+    One result per text from an analyze_batch call.
+
+    analyze_batch reports a failed batch as a single error entry; that entry
+    is repeated for each of the n texts (a generic error if there is none).
+    """
+    if len(results) == n:
+        return results
+    failed = next((result for result in results if "error" in result), None)
+    return [failed or {"error": f"expected {n} results, got {len(results)}"}] * n
+
+
+def check_batch(results: List[Dict], n: int) -> List[Dict]:
+    """expand_batch_errors for callers that cannot use partial results: raises on any error entry."""
+    results = expand_batch_errors(results, n)
+    failed = next((result for result in results if "error" in result), None)
+    if failed is not None:
+        raise RuntimeError(failed["error"])
+    return results
+
+
+class _Request:
+    __slots__ = ("text", "include_aspects", "future", "enqueued_at")
+
+    def __init__(self, text: str, include_aspects: bool):
+        self.text = text
+        self.include_aspects = include_aspects
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-text requests into batched model calls.
+
+    Every Streamlit session shares one analyzer; instead of each session
+    running its own batch-of-one forward pass, requests are queued and a
+    background thread hands them to ``analyze_batch`` together. A batch is
+    dispatched as soon as it is full or the oldest request has waited
+    ``max_wait_ms``.
+    """
+
+    def __init__(self, analyzer, max_batch_size: int = 32, max_wait_ms: float = 10.0):
+        """
+        Args:
+            analyzer: Object exposing ``analyze_batch`` (e.g. SentimentAnalyzer)
+            max_batch_size: Maximum number of requests per model call
+            max_wait_ms: Longest time a request waits for others to join its batch
+        """
+        self.analyzer = analyzer
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+
+        self.requests = 0
+        self.batches = 0
+        self.batch_sizes = Counter()
+
+        self._worker = threading.Thread(target=self._run, name="sentiment-micro-batcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, text: str, include_aspects: bool = False) -> Future:
+        """
+        Queue a text for analysis.
+
+        Returns:
+            Future resolved with the same dictionary ``analyze`` would return
+        """
+        request = _Request(text, include_aspects)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._queue.append(request)
+            self.requests += 1
+            self._condition.notify()
+        return request.future
+
+    def analyze(self, text: str, include_aspects: bool = False,
+                timeout: Optional[float] = None) -> Dict[str, Union[str, float, Dict]]:
+        """Drop-in replacement for ``SentimentAnalyzer.analyze`` that goes through the batcher."""
+        return self.submit(text, include_aspects).result(timeout)
+
+    def analyze_batch(self, texts: List[str], include_aspects: bool = False, show_progress: bool = False,
+                      timeout: Optional[float] = None) -> List[Dict[str, Union[str, float, Dict]]]:
+        """
+        Queue several texts at once and wait for all of them.
+
+        The texts share model calls with whatever else is queued, so callers
+        holding a MicroBatcher can use it wherever an analyzer is expected.
+        show_progress is accepted for interface compatibility and ignored.
+        """
+        futures = [self.submit(text, include_aspects) for text in texts]
+        return [future.result(timeout) for future in futures]
+
+    def _next_batch(self) -> List[_Request]:
+        with self._condition:
+            while not self._queue and not self._closed:
+                self._condition.wait()
+            if not self._queue:
+                return []
+
+            deadline = self._queue[0].enqueued_at + self.max_wait
+            while len(self._queue) < self.max_batch_size and not self._closed:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            size = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in range(size)]
+
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                return
+            self._dispatch(batch)
+
+    def _dispatch(self, batch: List[_Request]) -> None:
+        self.batches += 1
+        self.batch_sizes[len(batch)] += 1
+        logger.debug(f"Dispatching batch of {len(batch)} (queue depth {self.queue_depth})")
+
+        # analyze_batch takes a single include_aspects flag, so split on it
+        for include_aspects in (False, True):
+            group = [r for r in batch if r.include_aspects == include_aspects]
+            if not group:
+                continue
+            try:
+                results = expand_batch_errors(self.analyzer.analyze_batch([r.text for r in group],
+                                                                          include_aspects=include_aspects,
+                                                                          show_progress=False), len(group))
+                for request, result in zip(group, results):
+                    request.future.set_result(result)
+            except Exception as e:
+                logger.error(f"Error in micro-batched sentiment analysis: {str(e)}")
+                for request in group:
+                    request.future.set_exception(e)
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting to be batched."""
+        return len(self._queue)
+
+    def stats(self) -> Dict[str, Union[int, float, Dict[int, int]]]:
+        """Return queue depth and the distribution of achieved batch sizes."""
+        batched = sum(size * count for size, count in self.batch_sizes.items())
+        return {
+            "queue_depth": self.queue_depth,
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": batched / self.batches if self.batches else 0.0,
+            "largest_batch": max(self.batch_sizes, default=0),
+            "batch_size_histogram": dict(sorted(self.batch_sizes.items()))
+        }
+
+    def close(self) -> None:
+        """Stop accepting requests; queued requests are still processed."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._worker.join()
@@ -0,0 +1,165 @@
+"""
+Local stand-in for the OpenAI chat completions API.
+
+Answers POST /v1/chat/completions with an echo of the last user message,
+with optional latency and injected failures to exercise timeouts and
+retries. Requests with "stream": true get server-sent events, one word
+per chunk. Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8765/v1
+(any OPENAI_API_KEY value is accepted).
+
+Usage:
+    python mock_llm_server.py --port 8765 --latency-ms 200 --failure-rate 0.1 --token-delay-ms 30
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def echo_responder(messages: List[Dict[str, str]]) -> str:
+    """Default reply: echo the last user message."""
+    user_messages = [m["content"] for m in messages if m.get("role") == "user"]
+    return f"Mock reply to: {user_messages[-1] if user_messages else ''}"
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int],
+                 responder: Callable[[List[Dict[str, str]]], str] = echo_responder,
+                 latency_ms: float = 0.0,
+                 failure_rate: float = 0.0,
+                 token_delay_ms: float = 0.0):
+        super().__init__(address, _Handler)
+        self.responder = responder
+        self.latency = latency_ms / 1000.0
+        self.failure_rate = failure_rate
+        self.token_delay = token_delay_ms / 1000.0
+        self.cancelled_streams = 0
+        self.requests = 0
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: MockLLMServer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, request: Dict, content: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        words = content.split(" ")
+        try:
+            for i, word in enumerate(words):
+                chunk = {
+                    "id": f"chatcmpl-mock-{self.server.requests}",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request.get("model", "mock"),
+                    "choices": [{
+                        "index": 0,
+                        "delta": {"content": word if i == 0 else f" {word}"},
+                        "finish_reason": "stop" if i == len(words) - 1 else None
+                    }]
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+                if self.server.token_delay:
+                    time.sleep(self.server.token_delay)
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # The client cancelled the stream
+            self.server.cancelled_streams += 1
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        self.server.requests += 1
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if random.random() < self.server.failure_rate:
+            # Alternate between the two transient failures clients should retry
+            if random.random() < 0.5:
+                self._send_json(429, {"error": {"message": "rate limited", "type": "rate_limit"}},
+                                {"Retry-After": "0"})
+            else:
+                self._send_json(500, {"error": {"message": "internal error", "type": "server_error"}})
+            return
+
+        content = self.server.responder(request.get("messages", []))
+        if request.get("stream"):
+            self._send_stream(request, content)
+            return
+        self._send_json(200, {
+            "id": f"chatcmpl-mock-{self.server.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        })
+
+
+def start_mock_server(port: int = 0, **kwargs) -> MockLLMServer:
+    """
+    Start the mock server on a background thread.
+
+    Args:
+        port: Port to listen on (0 picks a free one)
+        **kwargs: responder, latency_ms, failure_rate and token_delay_ms
+
+    Returns:
+        The running server; its ``base_url`` goes into LLMClient(base_url=...)
+    """
+    server = MockLLMServer(("127.0.0.1", port), **kwargs)
+    threading.Thread(target=server.serve_forever, name="mock-llm-server", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the OpenAI chat completions API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Fraction of requests answered with 429/500")
+    parser.add_argument("--token-delay-ms", type=float, default=0.0, help="Delay between streamed words")
+    args = parser.parse_args()
+
+    server = MockLLMServer(("127.0.0.1", args.port), latency_ms=args.latency_ms,
+                           failure_rate=args.failure_rate, token_delay_ms=args.token_delay_ms)
+    print(f"Mock LLM API listening on {server.base_url}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
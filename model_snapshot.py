@@ -0,0 +1,310 @@
+"""
+Local, memory-mapped snapshots of the classifier models.
+
+A snapshot directory holds the tokenizer, the model config, a
+``model.safetensors`` weight file and a ``snapshot.json`` recording the
+source model and its resolved revision. Loading a snapshot never touches
+the Hugging Face hub, and its weights are mapped straight from the file
+instead of being deserialised, so worker processes on the same host share
+the read-only weight pages through the page cache.
+
+Usage:
+    # Write a snapshot of a hub model (or of a small random BERT with --tiny)
+    python model_snapshot.py save --model nlptown/bert-base-multilingual-uncased-sentiment --out models/sentiment
+    python model_snapshot.py save --tiny --out models/tiny
+
+    # Time loading it, optionally in several processes at once to see the shared pages
+    python model_snapshot.py load --path models/sentiment --workers 4
+    python model_snapshot.py load --path models/sentiment --no-mmap
+"""
+import argparse
+import json
+import logging
+import mmap
+import multiprocessing
+import os
+import struct
+import time
+from datetime import datetime, timezone
+from itertools import chain
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import torch
+import transformers
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = "snapshot.json"
+WEIGHTS_FILE = "model.safetensors"
+SNAPSHOT_FORMAT = 1
+
+_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool
+}
+
+
+class LoadedClassifier(NamedTuple):
+    """Tokenizer, model and identity of a loaded sequence classifier."""
+    tokenizer: Any
+    model: Optional[torch.nn.Module]
+    config: Any
+    revision: str
+    seconds: float
+
+
+def snapshot_info(path: str) -> Optional[Dict[str, Any]]:
+    """Return the contents of snapshot.json if path is a snapshot directory, else None."""
+    info_path = os.path.join(path, SNAPSHOT_FILE)
+    if not os.path.isfile(info_path):
+        return None
+    with open(info_path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_snapshot(model_name: str, out_dir: str, revision: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Write a snapshot of a sequence classifier.
+
+    Args:
+        model_name: Hugging Face model id or local model directory
+        out_dir: Directory to write the snapshot to
+        revision: Model revision to snapshot (defaults to the latest)
+
+    Returns:
+        The snapshot.json contents
+    """
+    from safetensors.torch import save_file
+
+    tokenizer = transformers.AutoTokenizer.from_pretrained(model_name, revision=revision)
+    model = transformers.AutoModelForSequenceClassification.from_pretrained(model_name, revision=revision)
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer.save_pretrained(out_dir)
+    model.config.save_pretrained(out_dir)
+
+    # Store every parameter and buffer (non-persistent buffers included) so the
+    # model can be rebuilt without running its initialisers. Tied weights are
+    # stored once and recorded as aliases.
+    tensors, aliases, stored = {}, {}, {}
+    named = chain(model.named_parameters(remove_duplicate=False), model.named_buffers(remove_duplicate=False))
+    for name, tensor in named:
+        if id(tensor) in stored:
+            aliases[name] = stored[id(tensor)]
+            continue
+        stored[id(tensor)] = name
+        tensors[name] = tensor.detach().cpu().contiguous()
+
+    info = {
+        "format": SNAPSHOT_FORMAT,
+        "source": model_name,
+        "revision": getattr(model.config, "_commit_hash", None) or revision or "main",
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "tensors": len(tensors),
+        "bytes": sum(t.numel() * t.element_size() for t in tensors.values())
+    }
+    save_file(tensors, os.path.join(out_dir, WEIGHTS_FILE), metadata={"aliases": json.dumps(aliases)})
+    with open(os.path.join(out_dir, SNAPSHOT_FILE), "w", encoding="utf-8") as f:
+        json.dump(info, f, indent=2)
+    return info
+
+
+def read_weights(path: str) -> Tuple[Dict[str, torch.Tensor], Dict[str, str]]:
+    """
+    Map a safetensors file into memory without copying the tensor data.
+
+    Returns:
+        Tensors backed by the mapping, and the file's metadata
+    """
+    with open(path, "rb") as f:
+        header_size = struct.unpack("<Q", f.read(8))[0]
+        header = json.loads(f.read(header_size))
+        # A private copy-on-write mapping: pages come from the page cache and are
+        # shared by every process mapping the file until one of them writes
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    metadata = header.pop("__metadata__", None) or {}
+
+    data_start = 8 + header_size
+    tensors = {}
+    for name, entry in header.items():
+        dtype = _DTYPES[entry["dtype"]]
+        begin, end = entry["data_offsets"]
+        element_size = torch.empty((), dtype=dtype).element_size()
+        count = (end - begin) // element_size
+        offset = data_start + begin
+        if count == 0:
+            tensor = torch.empty(0, dtype=dtype)
+        elif offset % element_size:
+            # Misaligned data can't be viewed in place
+            tensor = torch.frombuffer(bytearray(mapped[offset:data_start + end]), dtype=dtype)
+        else:
+            tensor = torch.frombuffer(mapped, dtype=dtype, count=count, offset=offset)
+        tensors[name] = tensor.reshape(entry["shape"])
+    return tensors, metadata
+
+
+def _assign(model: torch.nn.Module, name: str, value: torch.Tensor) -> None:
+    module_path, _, attr = name.rpartition(".")
+    module = model.get_submodule(module_path) if module_path else model
+    if attr in module._parameters:
+        if not isinstance(value, torch.nn.Parameter):
+            value = torch.nn.Parameter(value, requires_grad=False)
+        module._parameters[attr] = value
+    elif attr in module._buffers:
+        module._buffers[attr] = value
+    else:
+        raise KeyError(f"{name} is not a parameter or buffer of {type(model).__name__}")
+
+
+def load_model(path: str, use_mmap: bool = True) -> torch.nn.Module:
+    """
+    Load the model of a snapshot for inference.
+
+    Args:
+        path: Snapshot directory
+        use_mmap: Map the weights from disk; otherwise load them with from_pretrained
+
+    Returns:
+        Model in eval mode
+    """
+    if not use_mmap:
+        return transformers.AutoModelForSequenceClassification.from_pretrained(path, local_files_only=True).eval()
+
+    config = transformers.AutoConfig.from_pretrained(path, local_files_only=True)
+    tensors, metadata = read_weights(os.path.join(path, WEIGHTS_FILE))
+    # Build on the meta device so no memory is allocated or initialised for
+    # weights that are about to be replaced by the mapped ones
+    with torch.device("meta"):
+        model = transformers.AutoModelForSequenceClassification.from_config(config)
+    for name, tensor in tensors.items():
+        _assign(model, name, tensor)
+    for alias, target in json.loads(metadata.get("aliases", "{}")).items():
+        module_path, _, attr = target.rpartition(".")
+        module = model.get_submodule(module_path) if module_path else model
+        _assign(model, alias, module._parameters.get(attr, module._buffers.get(attr)))
+
+    missing = [name for name, t in chain(model.named_parameters(), model.named_buffers()) if t.is_meta]
+    if missing:
+        raise ValueError(f"Snapshot {path} is missing tensors: {', '.join(missing[:5])}")
+    return model.eval()
+
+
+def load_classifier(model_name: str, revision: Optional[str] = None, weights: bool = True,
+                    use_mmap: bool = True) -> LoadedClassifier:
+    """
+    Load a sequence classifier from a snapshot directory or the Hugging Face hub.
+
+    Args:
+        model_name: Snapshot directory, local model directory or hub model id
+        revision: Hub revision (ignored for snapshots, which are pinned)
+        weights: Load the model weights (the onnx backend only needs the config)
+        use_mmap: Map snapshot weights from disk instead of deserialising them
+
+    Returns:
+        Tokenizer, model (None without weights), config, resolved revision and load time
+    """
+    start = time.perf_counter()
+    info = snapshot_info(model_name)
+    if info is not None:
+        tokenizer = transformers.AutoTokenizer.from_pretrained(model_name, local_files_only=True)
+        model = load_model(model_name, use_mmap) if weights else None
+        config = model.config if model is not None else \
+            transformers.AutoConfig.from_pretrained(model_name, local_files_only=True)
+        resolved = info["revision"]
+    else:
+        tokenizer = transformers.AutoTokenizer.from_pretrained(model_name, revision=revision)
+        if weights:
+            model = transformers.AutoModelForSequenceClassification.from_pretrained(model_name, revision=revision)
+            config = model.config
+        else:
+            model = None
+            config = transformers.AutoConfig.from_pretrained(model_name, revision=revision)
+        resolved = getattr(config, "_commit_hash", None) or revision or "main"
+    seconds = time.perf_counter() - start
+    logger.info(f"Loaded {model_name} in {seconds:.2f}s{' from snapshot' if info is not None else ''}")
+    return LoadedClassifier(tokenizer, model, config, resolved, seconds)
+
+
+def memory_usage() -> Dict[str, float]:
+    """Resident, shared and private memory of this process in MiB (Linux only, else empty)."""
+    fields = {"Rss": "rss_mib", "Shared_Clean": "shared_clean_mib", "Private_Clean": "private_clean_mib",
+              "Private_Dirty": "private_dirty_mib"}
+    usage = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key in fields:
+                    usage[fields[key]] = int(value.split()[0]) / 1024
+    except OSError:
+        pass
+    return usage
+
+
+def _measure_load(path: str, use_mmap: bool, barrier, results) -> None:
+    start = time.perf_counter()
+    model = load_model(path, use_mmap)
+    seconds = time.perf_counter() - start
+    # Measure while every worker holds its model, so shared pages show up as shared
+    barrier.wait()
+    results.put({"pid": os.getpid(), "load_seconds": seconds, **memory_usage()})
+    barrier.wait()
+    del model
+
+
+def measure_load(path: str, workers: int = 1, use_mmap: bool = True) -> Dict[str, Any]:
+    """Load a snapshot in several fresh processes at once and report load time and memory per process."""
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=_measure_load, args=(path, use_mmap, barrier, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    rows = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return {"path": path, "mmap": use_mmap, "workers": rows}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Create and time local model snapshots")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    save_parser = subparsers.add_parser("save", help="Write a snapshot")
+    save_parser.add_argument("--model", help="Model id or local directory")
+    save_parser.add_argument("--tiny", action="store_true", help="Use a small random BERT instead of --model")
+    save_parser.add_argument("--revision", help="Hub revision to snapshot")
+    save_parser.add_argument("--out", required=True, help="Snapshot directory")
+
+    load_parser = subparsers.add_parser("load", help="Time loading a snapshot")
+    load_parser.add_argument("--path", required=True, help="Snapshot directory")
+    load_parser.add_argument("--workers", type=int, default=1, help="Processes loading it at the same time")
+    load_parser.add_argument("--no-mmap", action="store_true", help="Deserialise with from_pretrained instead")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if args.command == "save":
+        if not args.tiny and not args.model:
+            parser.error("either --model or --tiny is required")
+        if args.tiny:
+            from inference_backends import build_tiny_model
+            model_name = build_tiny_model()
+        else:
+            model_name = args.model
+        print(json.dumps(save_snapshot(model_name, args.out, args.revision), indent=2))
+        return
+
+    print(json.dumps(measure_load(args.path, args.workers, use_mmap=not args.no_mmap), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Multi-process sentiment scoring.
+
+Each worker process loads its own SentimentAnalyzer once and runs torch with
+a fixed number of intra-op threads, so a large box can be filled with
+several smaller model instances instead of one instance whose thread
+scaling has flattened out. Shards are distributed to the workers and the
+results come back in input order.
+
+Usage:
+    # Compare workers x threads layouts on the same corpus
+    python parallel_scoring.py --configs 1x8,2x4,4x2,8x1 --samples 2000
+    python parallel_scoring.py --configs 1x4,2x2,4x1 --input reviews.txt
+    python parallel_scoring.py --configs 1x2,2x1 --tiny
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from micro_batcher import check_batch
+
+logger = logging.getLogger(__name__)
+
+# Per-process analyzer, created by the pool initializer
+_analyzer = None
+
+
+def _init_worker(threads: int, analyzer_kwargs: Dict, cache_kwargs: Optional[Dict]) -> None:
+    import torch
+    from deep_learning import SentimentAnalyzer
+    from disk_cache import DiskCache
+
+    global _analyzer
+    torch.set_num_threads(threads)
+    cache = DiskCache(**cache_kwargs) if cache_kwargs else None
+    _analyzer = SentimentAnalyzer(cache=cache, **analyzer_kwargs)
+
+
+def _score_shard(texts: List[str], include_aspects: bool) -> List[Dict]:
+    return check_batch(_analyzer.analyze_batch(texts, include_aspects=include_aspects, show_progress=False),
+                       len(texts))
+
+
+class ShardedScorer:
+    """Process pool of SentimentAnalyzer workers."""
+
+    def __init__(self, workers: int,
+                 threads_per_worker: Optional[int] = None,
+                 analyzer_kwargs: Optional[Dict] = None,
+                 cache_kwargs: Optional[Dict] = None,
+                 shard_size: int = 256,
+                 max_in_flight: Optional[int] = None):
+        """
+        Args:
+            workers: Number of worker processes
+            threads_per_worker: torch intra-op threads per worker (cores / workers by default)
+            analyzer_kwargs: Keyword arguments for SentimentAnalyzer in each worker
+            cache_kwargs: Optional DiskCache arguments; the cache file is shared by the workers
+            shard_size: Texts sent to a worker at a time
+            max_in_flight: Shards queued at once (bounds memory; 2 x workers by default)
+        """
+        self.workers = workers
+        self.threads_per_worker = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        self.shard_size = shard_size
+        self.max_in_flight = max_in_flight or 2 * workers
+
+        # Forking a process that has already initialised torch threads can deadlock
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.threads_per_worker, analyzer_kwargs or {}, cache_kwargs)
+        )
+
+    def warm_up(self) -> float:
+        """
+        Make every worker load its model.
+
+        Returns:
+            Seconds taken
+        """
+        start = time.perf_counter()
+        futures = [self._executor.submit(_score_shard, ["warm up"], False) for _ in range(self.workers * 2)]
+        for future in futures:
+            future.result()
+        return time.perf_counter() - start
+
+    def score(self, texts: Iterable[str], include_aspects: bool = False) -> Iterator[Dict]:
+        """
+        Lazily score texts across the workers.
+
+        Args:
+            texts: Any iterable of texts; it is consumed shard by shard
+            include_aspects: Whether to include aspect-based sentiment analysis
+
+        Yields:
+            Result dictionaries in input order
+        """
+        iterator = iter(texts)
+        in_flight = deque()
+
+        def submit_next() -> bool:
+            shard = list(islice(iterator, self.shard_size))
+            if shard:
+                in_flight.append(self._executor.submit(_score_shard, shard, include_aspects))
+            return bool(shard)
+
+        while len(in_flight) < self.max_in_flight and submit_next():
+            pass
+        while in_flight:
+            results = in_flight.popleft().result()
+            submit_next()
+            yield from results
+
+    def score_list(self, texts: List[str], include_aspects: bool = False) -> List[Dict]:
+        """Score a list of texts and return the results in order."""
+        return list(self.score(texts, include_aspects))
+
+    def close(self) -> None:
+        self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def parse_configs(spec: str) -> List[Tuple[int, int]]:
+    """Parse "1x8,2x4" into [(1, 8), (2, 4)] (workers x threads per worker)."""
+    configs = []
+    for item in spec.split(","):
+        workers, threads = item.lower().split("x")
+        configs.append((int(workers), int(threads)))
+    return configs
+
+
+def benchmark(texts: List[str], configs: List[Tuple[int, int]],
+              analyzer_kwargs: Optional[Dict] = None,
+              shard_size: int = 256) -> List[Dict[str, float]]:
+    """
+    Time the same corpus under several workers x threads layouts.
+
+    Returns:
+        One row per configuration with startup time, wall time and throughput
+    """
+    rows = []
+    for workers, threads in configs:
+        with ShardedScorer(workers, threads, analyzer_kwargs, shard_size=shard_size) as scorer:
+            startup = scorer.warm_up()
+            start = time.perf_counter()
+            results = scorer.score_list(texts)
+            elapsed = time.perf_counter() - start
+        rows.append({
+            "workers": workers,
+            "threads_per_worker": threads,
+            "texts": len(results),
+            "startup_seconds": startup,
+            "seconds": elapsed,
+            "texts_per_second": len(results) / elapsed if elapsed else float("inf")
+        })
+        logger.info(f"{workers}x{threads}: {rows[-1]['texts_per_second']:.1f} texts/s")
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark multi-process sentiment scoring layouts")
+    parser.add_argument("--configs", default="1x4,2x2,4x1", help="Comma-separated WORKERSxTHREADS layouts")
+    parser.add_argument("--input", help="File with one text per line (synthetic reviews by default)")
+    parser.add_argument("--samples", type=int, default=1000, help="Number of synthetic reviews")
+    parser.add_argument("--shard-size", type=int, default=256)
+    parser.add_argument("--tiny", action="store_true", help="Use a small random BERT instead of the real model")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    if args.input:
+        with open(args.input, encoding="utf-8") as f:
+            texts = [line.strip() for line in f if line.strip()]
+    else:
+        from synthetic_reviews import generate_reviews
+        texts = generate_reviews(args.samples)
+
+    analyzer_kwargs = {}
+    if args.tiny:
+        from inference_backends import build_tiny_model
+        analyzer_kwargs["model_name"] = build_tiny_model()
+    else:
+        from config import SENTIMENT_MODEL, INFERENCE_BACKEND, SENTIMENT_ONNX_PATH
+        analyzer_kwargs.update(model_name=SENTIMENT_MODEL, backend=INFERENCE_BACKEND, onnx_path=SENTIMENT_ONNX_PATH)
+
+    rows = benchmark(texts, parse_configs(args.configs), analyzer_kwargs, args.shard_size)
+    print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
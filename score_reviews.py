@@ -0,0 +1,244 @@
+"""
+Stream a review export through the sentiment model.
+
+Reads CSV, JSONL or Parquet input one chunk at a time, appends one JSON
+line per review to the output and checkpoints after every chunk, so memory
+stays bounded and an interrupted run resumes where it stopped.
+
+Usage:
+    python score_reviews.py reviews.csv scores.jsonl --text-column review
+    python score_reviews.py reviews.parquet scores.jsonl --chunk-size 2048 --include-aspects
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from tqdm import tqdm
+
+from micro_batcher import check_batch
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("csv", "jsonl", "parquet")
+
+
+def detect_format(path: str) -> str:
+    """Infer the input format from the file extension."""
+    extension = os.path.splitext(path)[1].lower().lstrip(".")
+    if extension in ("json", "ndjson"):
+        extension = "jsonl"
+    if extension not in FORMATS:
+        raise ValueError(f"Cannot infer the format of {path}; pass --format ({', '.join(FORMATS)})")
+    return extension
+
+
+def read_rows(path: str, file_format: str, columns: List[str], batch_rows: int = 8192) -> Iterator[Dict]:
+    """
+    Lazily yield rows of the input file as dictionaries.
+
+    Args:
+        path: Input file
+        file_format: One of "csv", "jsonl" or "parquet"
+        columns: Columns needed downstream (used to prune Parquet reads)
+        batch_rows: Rows read at a time from Parquet files
+    """
+    if file_format == "csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+    elif file_format == "jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif file_format == "parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Reading Parquet requires pyarrow: pip install pyarrow") from e
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows, columns=columns):
+            yield from batch.to_pylist()
+    else:
+        raise ValueError(f"Unsupported format {file_format!r}")
+
+
+def chunked(iterable: Iterable, size: int) -> Iterator[List]:
+    """Yield successive lists of up to size items."""
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def load_checkpoint(path: str) -> Optional[Dict]:
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path: str, checkpoint: Dict) -> None:
+    """Atomically replace the checkpoint file."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def score_file(input_path: str,
+               output_path: str,
+               score_chunk: Callable[[List[str]], List[Dict]],
+               text_column: str = "text",
+               id_column: Optional[str] = None,
+               file_format: Optional[str] = None,
+               chunk_size: int = 1024,
+               checkpoint_path: Optional[str] = None,
+               keep_text: bool = False,
+               restart: bool = False,
+               show_progress: bool = True) -> int:
+    """
+    Score every row of an input file, resuming from a checkpoint if one exists.
+
+    Args:
+        input_path: CSV, JSONL or Parquet file of reviews
+        output_path: JSONL file the results are appended to
+        score_chunk: Function mapping a list of texts to a list of result dictionaries
+        text_column: Column holding the review text
+        id_column: Optional column copied into each output record
+        file_format: Input format (inferred from the extension by default)
+        chunk_size: Rows scored and checkpointed at a time
+        checkpoint_path: Progress file (defaults to the output path + ".checkpoint")
+        keep_text: Copy the review text into the output
+        restart: Ignore any existing checkpoint and start over
+        show_progress: Whether to show a progress bar
+
+    Returns:
+        Total number of rows scored, including those from earlier runs
+    """
+    file_format = file_format or detect_format(input_path)
+    checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+    identity = {"input": os.path.abspath(input_path), "text_column": text_column}
+
+    checkpoint = None if restart else load_checkpoint(checkpoint_path)
+    if checkpoint is not None and checkpoint["identity"] != identity:
+        raise ValueError(f"Checkpoint {checkpoint_path} belongs to a different input; use --restart")
+    if checkpoint is not None and not os.path.exists(output_path):
+        raise ValueError(f"Checkpoint {checkpoint_path} exists but {output_path} is missing; use --restart")
+    rows_done = checkpoint["rows_done"] if checkpoint else 0
+    output_bytes = checkpoint["output_bytes"] if checkpoint else 0
+
+    if rows_done:
+        logger.info(f"Resuming {input_path} after {rows_done} rows")
+
+    # Drop anything written after the last checkpoint, e.g. by a crash mid-chunk
+    mode = "r+b" if checkpoint else "wb"
+    columns = [text_column] + ([id_column] if id_column else [])
+    rows = islice(read_rows(input_path, file_format, columns), rows_done, None)
+    progress = tqdm(unit="rows", initial=rows_done, disable=not show_progress)
+
+    with open(output_path, mode) as out:
+        out.truncate(output_bytes)
+        out.seek(output_bytes)
+
+        for chunk in chunked(rows, chunk_size):
+            texts = ["" if row.get(text_column) is None else str(row[text_column]) for row in chunk]
+            results = check_batch(score_chunk(texts), len(texts))
+
+            lines = []
+            for offset, (row, text, result) in enumerate(zip(chunk, texts, results)):
+                record = {"row": rows_done + offset}
+                if id_column:
+                    record[id_column] = row.get(id_column)
+                record.update((k, v) for k, v in result.items() if k != "text")
+                if keep_text:
+                    record["text"] = text
+                lines.append(json.dumps(record, ensure_ascii=False))
+
+            out.write(("\n".join(lines) + "\n").encode("utf-8"))
+            out.flush()
+            os.fsync(out.fileno())
+
+            rows_done += len(chunk)
+            output_bytes = out.tell()
+            save_checkpoint(checkpoint_path, {
+                "identity": identity,
+                "rows_done": rows_done,
+                "output_bytes": output_bytes
+            })
+            progress.update(len(chunk))
+
+    progress.close()
+    return rows_done
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream reviews through the sentiment model")
+    parser.add_argument("input", help="CSV, JSONL or Parquet file of reviews")
+    parser.add_argument("output", help="JSONL file to append results to")
+    parser.add_argument("--format", choices=FORMATS, help="Input format (inferred from the extension by default)")
+    parser.add_argument("--text-column", default="text", help="Column holding the review text")
+    parser.add_argument("--id-column", help="Column copied into each output record")
+    parser.add_argument("--chunk-size", type=int, default=1024, help="Rows scored and checkpointed at a time")
+    parser.add_argument("--checkpoint", help="Progress file (defaults to OUTPUT.checkpoint)")
+    parser.add_argument("--include-aspects", action="store_true", help="Add aspect-based sentiment")
+    parser.add_argument("--keep-text", action="store_true", help="Copy the review text into the output")
+    parser.add_argument("--restart", action="store_true", help="Ignore any checkpoint and start over")
+    parser.add_argument("--cache", action="store_true", help="Use the persistent sentiment cache")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes, each with its own model")
+    parser.add_argument("--threads-per-worker", type=int, help="torch threads per worker (cores / workers by default)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    from config import (SENTIMENT_CACHE_PATH, SENTIMENT_CACHE_MAX_ENTRIES,
+                        SENTIMENT_MODEL, INFERENCE_BACKEND, SENTIMENT_ONNX_PATH,
+                        WINDOW_OVERLAP, WINDOW_AGGREGATION)
+
+    analyzer_kwargs = {"model_name": SENTIMENT_MODEL, "backend": INFERENCE_BACKEND, "onnx_path": SENTIMENT_ONNX_PATH,
+                       "window_overlap": WINDOW_OVERLAP, "aggregation": WINDOW_AGGREGATION}
+    cache_kwargs = None
+    if args.cache and SENTIMENT_CACHE_PATH:
+        cache_kwargs = {"path": SENTIMENT_CACHE_PATH, "max_entries": SENTIMENT_CACHE_MAX_ENTRIES}
+
+    scorer = None
+    if args.workers > 1:
+        from parallel_scoring import ShardedScorer
+        scorer = ShardedScorer(args.workers, args.threads_per_worker, analyzer_kwargs, cache_kwargs)
+
+        def score_chunk(texts):
+            return scorer.score_list(texts, include_aspects=args.include_aspects)
+    else:
+        from deep_learning import SentimentAnalyzer
+        from disk_cache import DiskCache
+
+        cache = DiskCache(**cache_kwargs) if cache_kwargs else None
+        analyzer = SentimentAnalyzer(cache=cache, **analyzer_kwargs)
+
+        def score_chunk(texts):
+            return analyzer.analyze_batch(texts, include_aspects=args.include_aspects, show_progress=False)
+
+    try:
+        total = score_file(args.input, args.output, score_chunk,
+                           text_column=args.text_column,
+                           id_column=args.id_column,
+                           file_format=args.format,
+                           chunk_size=args.chunk_size,
+                           checkpoint_path=args.checkpoint,
+                           keep_text=args.keep_text,
+                           restart=args.restart)
+    finally:
+        # Stop the worker processes even when scoring fails or is interrupted
+        if scorer is not None:
+            scorer.close()
+    logger.info(f"Scored {total} rows into {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Semantic response cache for LLM queries.
+
+Queries are embedded with a small local encoder and kept in a brute-force
+NumPy index; a new query whose cosine similarity to a stored one reaches
+the threshold gets the stored answer instead of a new LLM round trip. An
+optional key function (e.g. destination_key) keeps questions about
+different places apart however similar their wording.
+"""
+import re
+import threading
+import time
+import zlib
+from typing import Callable, Dict, FrozenSet, Hashable, Iterable, List, Optional, Union
+
+import numpy as np
+
+
+class HashingEncoder:
+    """
+    Dependency-free encoder hashing word and character n-grams into a fixed-size vector.
+
+    Matches on shared spelling rather than meaning, so it is only meant for
+    offline tests, never for serving.
+    """
+
+    name = "hashing"
+
+    def __init__(self, dim: int = 1024, char_ngrams: tuple = (3, 4)):
+        self.dim = dim
+        self.char_ngrams = char_ngrams
+
+    def _features(self, text: str) -> List[str]:
+        words = re.findall(r"\w+", text.lower())
+        features = [f"w:{w}" for w in words]
+        for word in words:
+            padded = f" {word} "
+            for n in self.char_ngrams:
+                features.extend(f"c:{padded[i:i + n]}" for i in range(len(padded) - n + 1))
+        return features
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Return L2-normalised float32 embeddings, one row per text."""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                # crc32 rather than hash(), which is salted per process
+                h = zlib.crc32(feature.encode("utf-8"))
+                vectors[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class TransformerEncoder:
+    """Mean-pooled sentence embeddings from a small local transformer (MiniLM by default)."""
+
+    name = "minilm"
+
+    def __init__(self, model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+        import torch
+        import transformers
+
+        self._torch = torch
+        self.tokenizer = transformers.AutoTokenizer.from_pretrained(model_name)
+        self.model = transformers.AutoModel.from_pretrained(model_name)
+        self.model.eval()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Return L2-normalised float32 embeddings, one row per text."""
+        torch = self._torch
+        inputs = self.tokenizer(texts, return_tensors="pt", truncation=True, max_length=128, padding=True)
+        with torch.no_grad():
+            hidden = self.model(**inputs).last_hidden_state
+        mask = inputs["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+        pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+        return torch.nn.functional.normalize(pooled, dim=-1).numpy().astype(np.float32)
+
+
+ENCODERS = {
+    "hashing": HashingEncoder,
+    "minilm": TransformerEncoder
+}
+
+_CAPITALISED_PATTERN = re.compile(r"(?<![.!?]\s)(?<!^)\b[A-Z]\w*")
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def destination_key(known: Iterable[str] = ()) -> Callable[[str], FrozenSet[str]]:
+    """
+    Build a SemanticCache key function returning the places a query names.
+
+    A place is any of the known destination names (matched in any case) or
+    a capitalised word that does not start a sentence ("I" aside), so
+    "What to see in Spain?" and "What to see in France?" get different keys.
+
+    Args:
+        known: Destination names, e.g. the content pack's
+    """
+    known = frozenset(name.lower() for name in known)
+
+    def key(query: str) -> FrozenSet[str]:
+        places = {word for word in _WORD_PATTERN.findall(query.lower()) if word in known}
+        places.update(word.lower() for word in _CAPITALISED_PATTERN.findall(query) if word != "I")
+        return frozenset(places)
+
+    return key
+
+
+class SemanticCache:
+    """
+    Near-duplicate query cache over a brute-force cosine similarity index.
+
+    Entries expire after ``ttl_seconds``; when the cache is full the least
+    recently used entry is evicted. With a key function, a stored query can
+    only answer a new one whose key is equal.
+    """
+
+    def __init__(self, encoder, threshold: float = 0.85, max_entries: int = 1000,
+                 ttl_seconds: Optional[float] = 24 * 3600,
+                 key: Optional[Callable[[str], Hashable]] = None):
+        """
+        Args:
+            encoder: Object with ``encode(texts) -> np.ndarray`` of normalised rows
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Maximum stored queries
+            ttl_seconds: Lifetime of an entry (None keeps entries until evicted)
+            key: Maps a query to a value that must match for a hit, e.g. destination_key()
+        """
+        self.encoder = encoder
+        self.threshold = threshold
+        self.key = key
+        self.max_entries = max_entries
+        self.ttl = ttl_seconds
+
+        self.lookups = 0
+        self.hits = 0
+        self.evictions = 0
+        self.expirations = 0
+
+        # Slot-based storage; the embedding matrix is allocated on first use
+        self._vectors = None
+        self._valid = np.zeros(max_entries, dtype=bool)
+        self._created = np.zeros(max_entries)
+        self._last_used = np.zeros(max_entries)
+        self._queries = [None] * max_entries
+        self._answers = [None] * max_entries
+        self._keys = [None] * max_entries
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float) -> None:
+        if self.ttl is None:
+            return
+        expired = self._valid & (now - self._created > self.ttl)
+        count = int(expired.sum())
+        if count:
+            self._valid[expired] = False
+            self.expirations += count
+
+    def _embed(self, query: str) -> np.ndarray:
+        return self.encoder.encode([query])[0]
+
+    def lookup(self, query: str) -> Optional[str]:
+        """
+        Return the answer stored for the most similar earlier query, if it is similar enough.
+
+        Args:
+            query: User query
+
+        Returns:
+            Cached answer, or None on a miss
+        """
+        vector = self._embed(query)
+        key = self.key(query) if self.key else None
+        now = time.time()
+        with self._lock:
+            self.lookups += 1
+            self._expire(now)
+            if self._vectors is None or not self._valid.any():
+                return None
+            similarities = self._vectors @ vector
+            similarities[~self._valid] = -np.inf
+            if self.key:
+                for slot in np.flatnonzero(self._valid):
+                    if self._keys[slot] != key:
+                        similarities[slot] = -np.inf
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.threshold:
+                return None
+            self.hits += 1
+            self._last_used[best] = now
+            return self._answers[best]
+
+    def store(self, query: str, answer: str) -> None:
+        """Add a query and its answer, evicting the least recently used entry if full."""
+        vector = self._embed(query)
+        key = self.key(query) if self.key else None
+        now = time.time()
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, vector.shape[0]), dtype=np.float32)
+            self._expire(now)
+            free = np.flatnonzero(~self._valid)
+            if free.size:
+                slot = int(free[0])
+            else:
+                slot = int(np.argmin(self._last_used))
+                self.evictions += 1
+            self._vectors[slot] = vector
+            self._valid[slot] = True
+            self._created[slot] = now
+            self._last_used[slot] = now
+            self._queries[slot] = query
+            self._answers[slot] = answer
+            self._keys[slot] = key
+
+    def get_or_compute(self, query: str, compute: Callable[[str], str]) -> str:
+        """Return a cached answer for query or compute, store and return a new one."""
+        answer = self.lookup(query)
+        if answer is None:
+            answer = compute(query)
+            self.store(query, answer)
+        return answer
+
+    def clear(self) -> None:
+        with self._lock:
+            self._valid[:] = False
+
+    def __len__(self) -> int:
+        return int(self._valid.sum())
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Return hit-rate statistics and the current size."""
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "misses": self.lookups - self.hits,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "entries": len(self),
+            "evictions": self.evictions,
+            "expirations": self.expirations
+        }
+
+
+def create_semantic_cache(encoder: str = "minilm", **kwargs) -> SemanticCache:
+    """Build a SemanticCache with the named encoder ("minilm", or "hashing" for offline tests)."""
+    return SemanticCache(ENCODERS[encoder](), **kwargs)
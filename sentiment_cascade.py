@@ -0,0 +1,407 @@
+"""
+Lexicon-first sentiment cascade.
+
+A word and n-gram lexicon scores each review first. Reviews whose lexicon
+confidence reaches the threshold are answered directly; the rest are sent
+to the BERT analyzer. Short, clearly worded reviews ("Amazing hotel, great
+staff!") therefore never reach the model, while mixed or subtle ones still
+do. The same split is applied to the sentences scored for aspects.
+
+The threshold trades latency for agreement with BERT. ``sweep`` measures,
+on a sample, how much traffic each threshold short-circuits and how often
+the lexicon then agrees with the model (and with gold labels, if given).
+
+Usage:
+    # Coverage and agreement per threshold on a labelled sample
+    python sentiment_cascade.py --input reviews.csv --text-column review --label-column rating
+    python sentiment_cascade.py --input reviews.jsonl --thresholds 0.6 0.7 0.8 0.9
+"""
+import argparse
+import json
+import logging
+import math
+import re
+import threading
+from typing import Callable, Dict, List, Mapping, Optional, Sequence, Tuple, Union
+
+from aspect_matcher import average_aspect_scores, find_aspect_sentences
+from micro_batcher import expand_batch_errors
+
+logger = logging.getLogger(__name__)
+
+SENTIMENT_LABELS = {
+    1: "Very Negative",
+    2: "Negative",
+    3: "Neutral",
+    4: "Positive",
+    5: "Very Positive"
+}
+
+# Word and phrase weights; strong terms count double
+POSITIVE_TERMS = {
+    "amazing": 2, "excellent": 2, "great": 2, "wonderful": 2, "fantastic": 2, "perfect": 2,
+    "outstanding": 2, "superb": 2, "brilliant": 2, "awesome": 2, "incredible": 2, "loved": 2,
+    "love": 2, "best": 2, "exceptional": 2, "stunning": 2,
+    "good": 1, "nice": 1, "clean": 1, "friendly": 1, "helpful": 1, "comfortable": 1,
+    "pleasant": 1, "enjoyed": 1, "beautiful": 1, "lovely": 1, "recommend": 1, "convenient": 1,
+    "spacious": 1, "delicious": 1, "tasty": 1, "relaxing": 1, "quiet": 1, "welcoming": 1,
+    "highly recommend": 3, "would recommend": 2, "worth every penny": 3, "well worth": 2,
+    "value for money": 1, "would stay again": 3, "will be back": 2
+}
+NEGATIVE_TERMS = {
+    "terrible": 2, "horrible": 2, "awful": 2, "poor": 2, "bad": 2, "worst": 2,
+    "disgusting": 2, "dreadful": 2, "appalling": 2, "filthy": 2, "nightmare": 2, "hate": 2,
+    "hated": 2, "rude": 2, "unacceptable": 2,
+    "dirty": 1, "noisy": 1, "disappointing": 1, "disappointed": 1, "uncomfortable": 1,
+    "overpriced": 1, "slow": 1, "broken": 1, "smelly": 1, "unfriendly": 1, "unhelpful": 1,
+    "cramped": 1, "mediocre": 1, "expensive": 1, "cold": 1, "delayed": 1, "cancelled": 1,
+    "waste of money": 3, "never again": 3, "rip off": 2, "fell apart": 2, "avoid this": 3,
+    "not worth": 2
+}
+NEGATORS = frozenset(["not", "no", "never", "hardly", "without", "nothing", "neither", "nor", "barely"])
+INTENSIFIERS = frozenset(["very", "really", "extremely", "so", "absolutely", "incredibly", "super",
+                          "totally", "truly", "highly"])
+# Words after which the clause that follows outweighs the one before
+CONTRASTS = frozenset(["but", "however", "although", "though", "yet"])
+
+_TOKEN_PATTERN = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?|[.!?;,:]")
+_CLAUSE_BREAKS = frozenset(".!?;,:")
+
+
+class LexiconScorer:
+    """Scores text with weighted sentiment words and phrases, handling negation and intensifiers."""
+
+    def __init__(self,
+                 positive: Mapping[str, float] = POSITIVE_TERMS,
+                 negative: Mapping[str, float] = NEGATIVE_TERMS,
+                 negators: Sequence[str] = NEGATORS,
+                 intensifiers: Sequence[str] = INTENSIFIERS,
+                 negation_scope: int = 3,
+                 negation_factor: float = -0.5,
+                 intensifier_factor: float = 1.5):
+        """
+        Args:
+            positive: Lower-case word or phrase -> weight
+            negative: Lower-case word or phrase -> weight (given as a positive number)
+            negators: Words that flip the polarity of the terms that follow them
+            intensifiers: Words that strengthen the next term
+            negation_scope: Tokens after a negator that it applies to (clauses end it early)
+            negation_factor: Multiplier for negated terms ("not good" is mildly negative)
+            intensifier_factor: Multiplier for intensified terms
+        """
+        self.weights: Dict[Tuple[str, ...], float] = {}
+        for terms, sign in ((positive, 1), (negative, -1)):
+            for term, weight in terms.items():
+                self.weights[tuple(term.lower().split())] = sign * weight
+        self.max_ngram = max((len(term) for term in self.weights), default=1)
+        self.negators = frozenset(negators)
+        self.intensifiers = frozenset(intensifiers)
+        self.negation_scope = negation_scope
+        self.negation_factor = negation_factor
+        self.intensifier_factor = intensifier_factor
+
+    def _is_negator(self, token: str) -> bool:
+        return token in self.negators or token.endswith("n't")
+
+    def score(self, text: str) -> Dict[str, Union[str, float, int]]:
+        """
+        Score one text.
+
+        Confidence combines how one-sided the evidence is, how much of it
+        there is, and how densely it covers the text; a long review with a
+        single "good" in it stays uncertain.
+
+        Args:
+            text: Text to score
+
+        Returns:
+            The analyzer's result fields (sentiment, score, confidence) plus
+            the positive and negative evidence behind them
+        """
+        tokens = _TOKEN_PATTERN.findall(text.lower().replace("’", "'"))
+        words = sum(1 for t in tokens if t not in _CLAUSE_BREAKS)
+        positive = negative = 0.0
+        strongest = 0.0
+        hits = 0
+        negated_until = -1
+        boost = 1.0
+        i = 0
+        while i < len(tokens):
+            token = tokens[i]
+            if token in _CLAUSE_BREAKS:
+                negated_until = -1
+                boost = 1.0
+                i += 1
+                continue
+            if token in CONTRASTS:
+                # The clause after "but" carries the reviewer's verdict
+                positive *= 0.5
+                negative *= 0.5
+                negated_until = -1
+                i += 1
+                continue
+
+            # Longest phrase starting here wins over its words
+            weight, length = None, 1
+            for n in range(min(self.max_ngram, len(tokens) - i), 0, -1):
+                weight = self.weights.get(tuple(tokens[i:i + n]))
+                if weight is not None:
+                    length = n
+                    break
+
+            if weight is None:
+                if self._is_negator(token):
+                    negated_until = i + self.negation_scope
+                elif token in self.intensifiers:
+                    boost = self.intensifier_factor
+                i += 1
+                continue
+
+            weight *= boost
+            if i <= negated_until:
+                weight *= self.negation_factor
+            if weight > 0:
+                positive += weight
+            else:
+                negative -= weight
+            strongest = max(strongest, abs(weight))
+            hits += 1
+            boost = 1.0
+            i += length
+
+        evidence = positive + negative
+        if evidence == 0:
+            return {"sentiment": SENTIMENT_LABELS[3], "score": 3, "confidence": 0.0,
+                    "positive": 0.0, "negative": 0.0}
+
+        net = positive - negative
+        purity = abs(net) / evidence
+        strength = 1.0 - math.exp(-evidence / 2.0)
+        coverage = min(1.0, 10.0 * hits / max(words, 1))
+        confidence = purity * strength * coverage
+
+        if net == 0:
+            score = 3
+        elif net > 0:
+            score = 5 if strongest >= 2 and net >= 3 else 4
+        else:
+            score = 1 if strongest >= 2 and net <= -3 else 2
+        return {
+            "sentiment": SENTIMENT_LABELS[score],
+            "score": score,
+            "confidence": confidence,
+            "positive": positive,
+            "negative": negative
+        }
+
+
+def _polarity(score: float) -> int:
+    return (score > 3) - (score < 3)
+
+
+class SentimentCascade:
+    """
+    Answers from the lexicon when it is confident and from the model otherwise.
+
+    Exposes the analyzer's ``analyze``/``analyze_batch`` interface; results
+    carry a ``source`` field ("lexicon" or "model").
+    """
+
+    def __init__(self, model_factory: Callable[[], object],
+                 scorer: Optional[LexiconScorer] = None,
+                 threshold: float = 0.75):
+        """
+        Args:
+            model_factory: Returns the fallback analyzer (anything with
+                ``analyze_batch``, e.g. SentimentAnalyzer or MicroBatcher);
+                called on first use, so the model isn't loaded while every
+                review is short-circuited
+            scorer: Lexicon scorer (the default lexicon if omitted)
+            threshold: Lexicon confidence at or above which the model is skipped;
+                above 1 every review goes to the model
+        """
+        self.model_factory = model_factory
+        self.scorer = scorer or LexiconScorer()
+        self.threshold = threshold
+        self._lock = threading.Lock()
+
+        self.requests = 0
+        self.short_circuited = 0
+        self.model_calls = 0
+        self.model_texts = 0
+        self.aspect_sentences = 0
+        self.aspect_sentences_short_circuited = 0
+
+    def _model_batch(self, texts: List[str], include_aspects: bool = False, count: bool = True) -> List[Dict]:
+        if count:
+            with self._lock:
+                self.model_calls += 1
+                self.model_texts += len(texts)
+        results = expand_batch_errors(
+            self.model_factory().analyze_batch(texts, include_aspects=include_aspects, show_progress=False),
+            len(texts))
+        return [{**result, "source": "model"} for result in results]
+
+    def _lexicon_aspects(self, texts: List[str]) -> List[Dict]:
+        """Aspects for texts answered by the lexicon; only uncertain sentences go to the model."""
+        groups_per_text = [find_aspect_sentences(text) for text in texts]
+        sentences = list(dict.fromkeys(
+            sentence for groups in groups_per_text for group in groups.values() for sentence in group
+        ))
+        scores = {}
+        uncertain = []
+        for sentence in sentences:
+            scored = self.scorer.score(sentence)
+            if scored["confidence"] >= self.threshold:
+                scores[sentence] = scored["score"]
+            else:
+                uncertain.append(sentence)
+        if uncertain:
+            for sentence, result in zip(uncertain, self._model_batch(uncertain)):
+                if "error" not in result:
+                    scores[sentence] = result["score"]
+        with self._lock:
+            self.aspect_sentences += len(sentences)
+            self.aspect_sentences_short_circuited += len(sentences) - len(uncertain)
+        return [average_aspect_scores(groups, scores, SENTIMENT_LABELS) for groups in groups_per_text]
+
+    def analyze(self, text: str, include_aspects: bool = False) -> Dict[str, Union[str, float, Dict]]:
+        """Analyze one text, like ``SentimentAnalyzer.analyze``."""
+        return self.analyze_batch([text], include_aspects)[0]
+
+    def analyze_batch(self, texts: List[str], include_aspects: bool = False,
+                      show_progress: bool = False) -> List[Dict[str, Union[str, float, Dict]]]:
+        """
+        Analyze several texts; those the lexicon is unsure of go to the model in one call.
+
+        Args:
+            texts: Texts to analyze
+            include_aspects: Whether to include aspect-based sentiment analysis
+            show_progress: Accepted for interface compatibility; unused
+
+        Returns:
+            Results in input order, each with a "source" field
+        """
+        results: List[Optional[Dict]] = [None] * len(texts)
+        confident, uncertain = [], []
+        for i, text in enumerate(texts):
+            scored = self.scorer.score(text)
+            if scored["confidence"] >= self.threshold:
+                results[i] = {"text": text, "sentiment": scored["sentiment"], "score": scored["score"],
+                              "confidence": scored["confidence"], "source": "lexicon"}
+                confident.append(i)
+            else:
+                uncertain.append(i)
+
+        with self._lock:
+            self.requests += len(texts)
+            self.short_circuited += len(confident)
+
+        try:
+            if uncertain:
+                model_results = self._model_batch([texts[i] for i in uncertain], include_aspects)
+                for i, result in zip(uncertain, model_results):
+                    results[i] = result
+            if include_aspects and confident:
+                for i, aspects in zip(confident, self._lexicon_aspects([texts[i] for i in confident])):
+                    results[i]["aspects"] = aspects
+        except Exception as e:
+            logger.error(f"Error in cascaded sentiment analysis: {str(e)}")
+            results = [result or {"error": str(e)} for result in results]
+        return results
+
+    def stats(self) -> Dict[str, Union[int, float]]:
+        """Return how much traffic the lexicon answered without the model."""
+        return {
+            "threshold": self.threshold,
+            "requests": self.requests,
+            "short_circuited": self.short_circuited,
+            "short_circuit_rate": self.short_circuited / self.requests if self.requests else 0.0,
+            "model_calls": self.model_calls,
+            "model_texts": self.model_texts,
+            "aspect_sentences": self.aspect_sentences,
+            "aspect_sentences_short_circuited": self.aspect_sentences_short_circuited
+        }
+
+    def sweep(self, texts: List[str], thresholds: Sequence[float],
+              labels: Optional[Sequence[int]] = None) -> List[Dict[str, Optional[float]]]:
+        """
+        Measure coverage and agreement for several thresholds on a sample.
+
+        Every text is scored by both the lexicon and the model once; each
+        threshold is then evaluated on those scores.
+
+        Args:
+            texts: Sample reviews
+            thresholds: Thresholds to evaluate
+            labels: Optional gold 1-5 scores for the same texts
+
+        Returns:
+            One row per threshold: the fraction short-circuited, exact and
+            polarity agreement with the model on the short-circuited texts,
+            and, with labels, the accuracy of the cascade and of the model alone
+        """
+        lexicon = [self.scorer.score(text) for text in texts]
+        model = self._model_batch(list(texts), count=False)
+        usable = [i for i, result in enumerate(model) if "error" not in result]
+        if not usable:
+            raise RuntimeError(f"The model failed on the sample: {model[0].get('error') if model else 'empty'}")
+
+        rows = []
+        for threshold in thresholds:
+            covered = [i for i in usable if lexicon[i]["confidence"] >= threshold]
+            row = {
+                "threshold": threshold,
+                "short_circuit_rate": len(covered) / len(usable),
+                "agreement": None,
+                "polarity_agreement": None
+            }
+            if covered:
+                row["agreement"] = sum(lexicon[i]["score"] == model[i]["score"] for i in covered) / len(covered)
+                row["polarity_agreement"] = sum(
+                    _polarity(lexicon[i]["score"]) == _polarity(model[i]["score"]) for i in covered
+                ) / len(covered)
+            if labels is not None:
+                covered_set = set(covered)
+                predictions = {i: lexicon[i]["score"] if i in covered_set else model[i]["score"] for i in usable}
+                row["cascade_accuracy"] = sum(predictions[i] == labels[i] for i in usable) / len(usable)
+                row["model_accuracy"] = sum(model[i]["score"] == labels[i] for i in usable) / len(usable)
+            rows.append(row)
+        return rows
+
+    def evaluate(self, texts: List[str], labels: Optional[Sequence[int]] = None) -> Dict[str, Optional[float]]:
+        """Coverage and agreement at the configured threshold (see ``sweep``)."""
+        return self.sweep(texts, [self.threshold], labels)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune the lexicon threshold of the sentiment cascade")
+    parser.add_argument("--input", required=True, help="CSV, JSONL or Parquet file of reviews")
+    parser.add_argument("--text-column", default="text", help="Column holding the review text")
+    parser.add_argument("--label-column", help="Column holding a gold 1-5 rating")
+    parser.add_argument("--limit", type=int, default=2000, help="Rows to sample from the start of the file")
+    parser.add_argument("--thresholds", type=float, nargs="*", default=[0.5, 0.6, 0.7, 0.75, 0.8, 0.9])
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    from itertools import islice
+    from config import SENTIMENT_MODEL, INFERENCE_BACKEND, SENTIMENT_ONNX_PATH, WINDOW_OVERLAP, WINDOW_AGGREGATION
+    from deep_learning import SentimentAnalyzer
+    from score_reviews import detect_format, read_rows
+
+    columns = [args.text_column] + ([args.label_column] if args.label_column else [])
+    rows = [row for row in islice(read_rows(args.input, detect_format(args.input), columns), args.limit)
+            if row.get(args.text_column)]
+    texts = [str(row[args.text_column]) for row in rows]
+    labels = [int(round(float(row[args.label_column]))) for row in rows] if args.label_column else None
+
+    analyzer = SentimentAnalyzer(SENTIMENT_MODEL, backend=INFERENCE_BACKEND, onnx_path=SENTIMENT_ONNX_PATH,
+                                 window_overlap=WINDOW_OVERLAP, aggregation=WINDOW_AGGREGATION)
+    cascade = SentimentCascade(lambda: analyzer)
+    print(json.dumps({"samples": len(texts), "thresholds": cascade.sweep(texts, args.thresholds, labels)},
+                     indent=2))
+
+
+if __name__ == "__main__":
+    main()
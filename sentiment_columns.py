@@ -0,0 +1,103 @@
+"""
+Columnar sentiment results for bulk scoring.
+
+``SentimentAnalyzer.analyze_batch_columns`` returns one NumPy array per
+field instead of one dictionary per review, so scoring millions of reviews
+creates no per-row Python objects and keeps no copy of the texts. The
+confidence boost shown on the Reviews page is available here as an array
+operation over those columns.
+"""
+from typing import Iterable, Mapping, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from sentiment_cascade import SENTIMENT_LABELS
+
+# Label names indexed by label_index (score - 1)
+LABEL_NAMES = tuple(SENTIMENT_LABELS[score] for score in sorted(SENTIMENT_LABELS))
+
+# Words that make a review's sentiment unambiguous
+CLEAR_POSITIVE = frozenset(["amazing", "excellent", "great", "wonderful", "fantastic", "perfect"])
+CLEAR_NEGATIVE = frozenset(["terrible", "horrible", "awful", "poor", "bad", "worst"])
+CLEAR_WORDS = CLEAR_POSITIVE | CLEAR_NEGATIVE
+
+
+class SentimentColumns(NamedTuple):
+    """Scores of a batch of texts, one array per field, in input order."""
+    score: np.ndarray          # int8, 1 (very negative) to 5 (very positive)
+    label_index: np.ndarray    # int8, index into LABEL_NAMES
+    confidence: np.ndarray     # float32, probability of the predicted score
+
+    @classmethod
+    def from_scores(cls, score: np.ndarray, confidence: np.ndarray) -> "SentimentColumns":
+        score = np.asarray(score, dtype=np.int8)
+        return cls(score, score - 1, np.asarray(confidence, dtype=np.float32))
+
+    @classmethod
+    def concatenate(cls, parts: Sequence["SentimentColumns"]) -> "SentimentColumns":
+        """Join the results of several chunks."""
+        if not parts:
+            return cls.from_scores(np.zeros(0, dtype=np.int8), np.zeros(0, dtype=np.float32))
+        return cls(*(np.concatenate(column) for column in zip(*parts)))
+
+    def to_pandas(self):
+        """DataFrame with a categorical label column (no per-row strings)."""
+        import pandas as pd
+        return pd.DataFrame({
+            "score": self.score,
+            "label": pd.Categorical.from_codes(self.label_index, categories=list(LABEL_NAMES)),
+            "confidence": self.confidence
+        })
+
+    def to_arrow(self):
+        """pyarrow Table with a dictionary-encoded label column."""
+        import pyarrow as pa
+        return pa.table({
+            "score": self.score,
+            "label": pa.DictionaryArray.from_arrays(self.label_index, list(LABEL_NAMES)),
+            "confidence": self.confidence
+        })
+
+
+def clear_word_mask(texts: Iterable[str], words: frozenset = CLEAR_WORDS) -> np.ndarray:
+    """Boolean array marking the texts that contain one of words."""
+    return np.fromiter((not words.isdisjoint(text.lower().split()) for text in texts), dtype=bool)
+
+
+def aspect_consistency_mask(aspects: Iterable[Optional[Mapping[str, Mapping]]]) -> np.ndarray:
+    """
+    Boolean array marking results whose aspects all lean the same way.
+
+    Args:
+        aspects: Per-review aspect results (as in an analyzer result's "aspects")
+
+    Returns:
+        True where there is at least one aspect and every aspect score is
+        at least 4, or every one is at most 2
+    """
+    def consistent(found):
+        if not found:
+            return False
+        scores = [details["score"] for details in found.values()]
+        return all(s >= 4 for s in scores) or all(s <= 2 for s in scores)
+    return np.fromiter((consistent(found) for found in aspects), dtype=bool)
+
+
+def boost_confidence(confidence, clear_words, aspects_consistent=None) -> np.ndarray:
+    """
+    Raise the displayed confidence of clear-cut reviews.
+
+    Args:
+        confidence: Model confidence in [0, 1] (array or scalar)
+        clear_words: Whether each review contains a clear sentiment word
+        aspects_consistent: Whether each review's aspects all lean the same way
+
+    Returns:
+        Confidence in percent: x1.2 for clear words and x1.1 for consistent
+        aspects, each capped at 100
+    """
+    percent = np.asarray(confidence, dtype=np.float32) * 100
+    percent = np.where(clear_words, np.minimum(percent * 1.2, 100), percent)
+    if aspects_consistent is not None:
+        percent = np.where(aspects_consistent, np.minimum(percent * 1.1, 100), percent)
+    return percent
@@ -0,0 +1,165 @@
+"""
+Startup cost report for the app.
+
+Each module is imported in a fresh interpreter under ``-X importtime`` to
+measure its cumulative import time and the direct imports that dominate
+it. Each page is then rendered once in a fresh interpreter with
+Streamlit's AppTest to measure first-render time and whether the heavy ML
+stack was loaded. The exit status is non-zero if anything fails to load,
+a page pulls in heavy modules it does not need, or --budget-ms is exceeded.
+
+Usage:
+    python startup_profile.py
+    python startup_profile.py --pages Translation Phrases --budget-ms 1500
+    python startup_profile.py --skip-render --modules app deep_learning
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_MODULES = [
+    "config", "instrumentation", "content_pack", "intent_router", "disk_cache", "micro_batcher", "sentiment_cascade",
+    "translation", "llm_client", "utils", "deep_learning", "app"
+]
+PAGES = ["Translation", "Phrases", "Exercises", "Assistant", "Reviews"]
+
+# Modules that should only be loaded by the features that need them
+HEAVY_MODULES = ["torch", "transformers", "openai", "httpx", "deep_learning"]
+# Pages allowed to load them on first render; anything else is a regression
+HEAVY_ALLOWED = {
+    "Reviews": {"torch", "transformers", "deep_learning"},
+    "Assistant": {"openai", "httpx"}
+}
+
+_RENDER_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+loaded = time.perf_counter()
+at = AppTest.from_file({app_path!r}, default_timeout={timeout!r})
+at.session_state["current_page"] = {page!r}
+at.run()
+done = time.perf_counter()
+print(json.dumps({{
+    "streamlit_import_ms": 1000 * (loaded - start),
+    "render_ms": 1000 * (done - loaded),
+    "exceptions": [str(e.value) for e in at.exception],
+    "heavy_modules_loaded": [m for m in {heavy!r} if m in sys.modules]
+}}))
+"""
+
+
+def _run(args: List[str], timeout: float) -> subprocess.CompletedProcess:
+    return subprocess.run(args, cwd=REPO_DIR, capture_output=True, text=True, timeout=timeout)
+
+
+def parse_importtime(stderr: str, module: str, top: int = 5) -> Optional[Dict]:
+    """
+    Extract the cost of one module from ``-X importtime`` output.
+
+    Args:
+        stderr: Interpreter stderr
+        module: Module that was imported
+        top: Number of direct imports to report
+
+    Returns:
+        Cumulative import time and the most expensive direct imports (ms),
+        or None if the module never finished importing
+    """
+    children = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        self_us, cumulative_us, name = fields
+        if not cumulative_us.strip().isdigit():
+            # Header line
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if depth == 0:
+            if name == module:
+                children.sort(key=lambda child: child[1], reverse=True)
+                return {
+                    "cumulative_ms": int(cumulative_us) / 1000,
+                    "self_ms": int(self_us) / 1000,
+                    "top_imports": {child: us / 1000 for child, us in children[:top]}
+                }
+            children = []
+        elif depth == 1:
+            children.append((name, int(cumulative_us)))
+    return None
+
+
+def profile_import(module: str, timeout: float = 300.0) -> Dict:
+    """Import module in a fresh interpreter and report its import cost."""
+    start = time.perf_counter()
+    result = _run([sys.executable, "-X", "importtime", "-c", f"import {module}"], timeout)
+    wall_ms = 1000 * (time.perf_counter() - start)
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        return {"interpreter_wall_ms": wall_ms, "error": lines[-1] if lines else "import failed"}
+    report = parse_importtime(result.stderr, module) or {}
+    report["interpreter_wall_ms"] = wall_ms
+    return report
+
+
+def profile_render(page: str, app_path: str = "app.py", timeout: float = 300.0) -> Dict:
+    """Render one page of the app once in a fresh interpreter and report how long it took."""
+    script = _RENDER_SCRIPT.format(app_path=app_path, page=page, timeout=timeout, heavy=HEAVY_MODULES)
+    start = time.perf_counter()
+    result = _run([sys.executable, "-c", script], timeout)
+    wall_ms = 1000 * (time.perf_counter() - start)
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        return {"interpreter_wall_ms": wall_ms, "error": lines[-1] if lines else "render failed"}
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report["interpreter_wall_ms"] = wall_ms
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import and first-render cost of the app")
+    parser.add_argument("--modules", nargs="*", default=DEFAULT_MODULES, help="Modules to import-profile")
+    parser.add_argument("--pages", nargs="*", default=PAGES, help="Pages to render")
+    parser.add_argument("--skip-render", action="store_true", help="Only profile imports")
+    parser.add_argument("--budget-ms", type=float,
+                        help="Fail if a page's first render, or importing app, takes longer than this")
+    args = parser.parse_args()
+
+    report = {"imports": {}, "renders": {}}
+    for module in args.modules:
+        report["imports"][module] = profile_import(module)
+    if not args.skip_render:
+        for page in args.pages:
+            report["renders"][page] = profile_render(page)
+    print(json.dumps(report, indent=2))
+
+    failures = [f"import {module}: {r['error']}" for module, r in report["imports"].items() if "error" in r]
+    failures += [f"{page}: {r['error']}" for page, r in report["renders"].items() if "error" in r]
+    for page, r in report["renders"].items():
+        unexpected = set(r.get("heavy_modules_loaded", [])) - HEAVY_ALLOWED.get(page, set())
+        if unexpected:
+            failures.append(f"{page}: loaded {', '.join(sorted(unexpected))} on first render")
+    if args.budget_ms is not None:
+        app_import = report["imports"].get("app", {}).get("cumulative_ms")
+        if app_import is not None and app_import > args.budget_ms:
+            failures.append(f"import app: {app_import:.0f} ms > {args.budget_ms:.0f} ms")
+        for page, r in report["renders"].items():
+            if r.get("render_ms", 0) > args.budget_ms:
+                failures.append(f"{page}: {r['render_ms']:.0f} ms > {args.budget_ms:.0f} ms")
+    if failures:
+        print("\n".join(failures), file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import random
+from typing import List
+
+# Building blocks for synthetic travel reviews; enough variety to exercise
+# tokenization, batching and aspect matching without shipping real data.
+SUBJECTS = [
+    "The hotel", "Our room", "The staff", "The food", "The restaurant", "The flight",
+    "The location", "The price", "The breakfast", "The beach", "The tour guide",
+    "The bathroom", "The airport transfer", "The view", "The service", "The museum"
+]
+
+OPINIONS = [
+    "was amazing", "was excellent", "was great", "was wonderful", "was perfect",
+    "was fine", "was okay", "was average", "was not bad", "could have been better",
+    "was poor", "was terrible", "was horrible", "was awful", "was the worst part of the trip"
+]
+
+DETAILS = [
+    "", "", "", " and we would come back", " compared to other places we stayed",
+    " for the money", " during our week in Rome", " on the first night",
+    " despite the long delays", " thanks to the friendly people", " in the rainy season"
+]
+
+
+def generate_reviews(n: int, seed: int = 0, min_sentences: int = 1, max_sentences: int = 12) -> List[str]:
+    """
+    Generate deterministic synthetic travel reviews of mixed length.
+
+    Args:
+        n: Number of reviews to generate
+        seed: Random seed, so runs are reproducible
+        min_sentences: Minimum sentences per review
+        max_sentences: Maximum sentences per review
+
+    Returns:
+        List of review texts
+    """
+    rng = random.Random(seed)
+    reviews = []
+    for _ in range(n):
+        sentences = [
+            f"{rng.choice(SUBJECTS)} {rng.choice(OPINIONS)}{rng.choice(DETAILS)}."
+            for _ in range(rng.randint(min_sentences, max_sentences))
+        ]
+        reviews.append(" ".join(sentences))
+    return reviews
+
+
+def vocabulary() -> List[str]:
+    """Return the lowercase words used by the generator."""
+    words = set()
+    for phrase in SUBJECTS + OPINIONS + DETAILS:
+        words.update(phrase.lower().split())
+    return sorted(words)
@@ -0,0 +1,397 @@
+"""
+Translation backends with in-memory and on-disk caching.
+
+Usage:
+    # Measure cold vs. cached latency without network access
+    python translation.py --backend local --latency-ms 150
+
+    # Translate a long document in concurrent chunks
+    python translation.py --backend local --latency-ms 150 --document guide.txt --workers 8
+"""
+import argparse
+import hashlib
+import json
+import re
+import threading
+import time
+import unicodedata
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from disk_cache import DiskCache, LRUCache
+
+
+class GoogleTranslateBackend:
+    """Google Translate through deep_translator."""
+
+    name = "google"
+    # Longest text accepted in a single request
+    max_chars = 5000
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def _translator(self, source: str, target: str):
+        # One client per language pair and thread instead of one per request;
+        # GoogleTranslator keeps per-request state, so it isn't shared across threads
+        translators = getattr(self._local, "translators", None)
+        if translators is None:
+            translators = self._local.translators = {}
+        translator = translators.get((source, target))
+        if translator is None:
+            from deep_translator import GoogleTranslator
+            translator = translators[(source, target)] = GoogleTranslator(source=source, target=target)
+        return translator
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        return self._translator(source, target).translate(text)
+
+
+class LocalTranslateBackend:
+    """
+    Offline stand-in backend for tests and benchmarks.
+
+    Returns the input tagged with the target language after an optional
+    simulated network delay.
+    """
+
+    name = "local"
+    max_chars = 5000
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000.0
+        self.calls = 0
+
+    def translate(self, text: str, source: str, target: str) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return f"[{target}] {text}"
+
+
+BACKENDS = {
+    "google": GoogleTranslateBackend,
+    "local": LocalTranslateBackend
+}
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a text for cache keys: NFC, trimmed, with runs of spaces collapsed per line."""
+    text = unicodedata.normalize("NFC", text)
+    return "\n".join(" ".join(line.split()) for line in text.strip().splitlines())
+
+
+class RateLimiter:
+    """Token bucket limiting how many requests start per second across threads."""
+
+    def __init__(self, rate_per_second: float, burst: Optional[int] = None):
+        self.rate = rate_per_second
+        self.capacity = burst or max(1, int(rate_per_second))
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request may start."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_seconds = (1 - self.tokens) / self.rate
+            time.sleep(wait_seconds)
+
+
+_rate_limiters: Dict[str, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(backend_name: str, rate_per_second: float) -> RateLimiter:
+    """Process-wide limiter for a backend, so every translator and document shares its quota."""
+    with _rate_limiters_lock:
+        limiter = _rate_limiters.get(backend_name)
+        if limiter is None:
+            limiter = _rate_limiters[backend_name] = RateLimiter(rate_per_second)
+        return limiter
+
+
+class CachedTranslator:
+    """
+    Translator front end with an in-memory LRU, an optional on-disk cache and
+    de-duplication of identical requests that are in flight at the same time.
+    Only requests that reach the backend count against the rate limit.
+    """
+
+    def __init__(self, backend, cache: Optional[DiskCache] = None, memory_size: int = 4096,
+                 rate_limiter: Optional[RateLimiter] = None):
+        """
+        Args:
+            backend: Object with ``translate(text, source, target)``
+            cache: Optional persistent cache shared across processes
+            memory_size: Number of translations kept in memory
+            rate_limiter: Limiter acquired before each backend request (unlimited if None)
+        """
+        self.backend = backend
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.memory = LRUCache(memory_size)
+        self.coalesced = 0
+        self.backend_calls = 0
+
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def _key(self, text: str, source: str, target: str) -> Tuple[str, str, str]:
+        return (source, target, normalize_text(text))
+
+    def _disk_key(self, key: Tuple[str, str, str]) -> str:
+        payload = json.dumps([self.backend.name, *key])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def translate(self, text: str, source: str = "auto", target: str = "english") -> str:
+        """
+        Translate text, serving repeats from the caches.
+
+        Args:
+            text: Text to translate
+            source: Source language name or "auto"
+            target: Target language name
+
+        Returns:
+            Translated text
+        """
+        key = self._key(text, source, target)
+        if not key[2]:
+            return text
+
+        cached = self.memory.get(key)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+            else:
+                self.coalesced += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            translation = self.cache.get(self._disk_key(key)) if self.cache is not None else None
+            if translation is None:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire()
+                self.backend_calls += 1
+                translation = self.backend.translate(text, source, target)
+                if self.cache is not None:
+                    self.cache.set(self._disk_key(key), translation)
+            self.memory.set(key, translation)
+            future.set_result(translation)
+            return translation
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    @property
+    def max_chars(self) -> int:
+        """Longest text the backend accepts in one request."""
+        return self.backend.max_chars
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache and de-duplication counters."""
+        return {
+            "memory": self.memory.stats(),
+            "disk": self.cache.stats() if self.cache is not None else None,
+            "backend_calls": self.backend_calls,
+            "coalesced": self.coalesced
+        }
+
+
+# A sentence runs up to terminal punctuation (Latin or CJK) or a line break,
+# and keeps the whitespace that follows it
+SENTENCE_PATTERN = re.compile(r"[^.!?\u3002\uff01\uff1f\n]*(?:[.!?\u3002\uff01\uff1f]+|\n|$)\s*")
+
+
+def _split_long(sentence: str, max_chars: int) -> List[str]:
+    """Split a single over-long sentence, preferring whitespace boundaries."""
+    pieces = []
+    while len(sentence) > max_chars:
+        cut = sentence.rfind(" ", 0, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(sentence[:cut])
+        sentence = sentence[cut:]
+    if sentence:
+        pieces.append(sentence)
+    return pieces
+
+
+def split_into_chunks(text: str, max_chars: int) -> List[str]:
+    """
+    Split text on sentence boundaries into chunks of at most max_chars.
+
+    Concatenating the chunks gives back the original text exactly.
+
+    Args:
+        text: Text to split
+        max_chars: Maximum characters per chunk
+
+    Returns:
+        List of chunks in document order
+    """
+    chunks = []
+    current = ""
+    for match in SENTENCE_PATTERN.finditer(text):
+        sentence = match.group(0)
+        if not sentence:
+            continue
+        for piece in _split_long(sentence, max_chars):
+            if current and len(current) + len(piece) > max_chars:
+                chunks.append(current)
+                current = ""
+            current += piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+_executors: Dict[int, ThreadPoolExecutor] = {}
+_executors_lock = threading.Lock()
+
+
+def _get_executor(max_workers: int) -> ThreadPoolExecutor:
+    """Shared pool per worker count, so its threads (and their backend clients) outlive each document."""
+    with _executors_lock:
+        executor = _executors.get(max_workers)
+        if executor is None:
+            executor = _executors[max_workers] = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix="translation")
+        return executor
+
+
+def translate_document(translator: CachedTranslator, text: str,
+                       source: str = "auto", target: str = "english",
+                       max_chars: Optional[int] = None,
+                       max_workers: int = 4) -> Iterator[Tuple[int, int, str]]:
+    """
+    Translate a long text as concurrent sentence-aligned chunks.
+
+    Chunks are translated by a bounded thread pool shared by every call with
+    the same max_workers and reassembled in document order. Rate limiting is
+    up to the translator, so cached chunks are never throttled.
+
+    Args:
+        translator: Translator to use for each chunk
+        text: Document to translate
+        source: Source language name or "auto"
+        target: Target language name
+        max_chars: Maximum characters per request (the backend's limit by default)
+        max_workers: Size of the shared pool (maximum concurrent requests)
+
+    Yields:
+        (chunks done, total chunks, translated text so far) each time a chunk
+        finishes; the text covers the longest finished prefix of the document
+    """
+    chunks = split_into_chunks(text, max_chars or translator.max_chars)
+    translated = [None] * len(chunks)
+
+    def translate_chunk(chunk: str) -> str:
+        body = chunk.strip()
+        if not body:
+            return chunk
+        # Keep the chunk's surrounding whitespace, which translators drop
+        leading = chunk[:len(chunk) - len(chunk.lstrip())]
+        trailing = chunk[len(chunk.rstrip()):]
+        return leading + translator.translate(body, source, target) + trailing
+
+    executor = _get_executor(max_workers)
+    pending = {}
+    try:
+        pending = {executor.submit(translate_chunk, chunk): i for i, chunk in enumerate(chunks)}
+        done_count = 0
+        prefix_end = 0
+        while pending:
+            finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in finished:
+                translated[pending.pop(future)] = future.result()
+                done_count += 1
+            while prefix_end < len(chunks) and translated[prefix_end] is not None:
+                prefix_end += 1
+            yield done_count, len(chunks), "".join(translated[:prefix_end])
+    finally:
+        # Drop this document's queued chunks if the caller gives up early;
+        # the pool itself is kept for the next document
+        for future in pending:
+            future.cancel()
+
+
+def create_translator(backend: str = "google", cache_path: Optional[str] = None,
+                      cache_max_entries: int = 100_000, rate_limit: Optional[float] = None,
+                      **backend_kwargs) -> CachedTranslator:
+    """
+    Build a CachedTranslator for the named backend ("google" or "local").
+
+    rate_limit caps backend requests started per second across the whole
+    process; the first translator created for a backend sets the rate.
+    """
+    cache = DiskCache(cache_path, cache_max_entries) if cache_path else None
+    limiter = get_rate_limiter(backend, rate_limit) if rate_limit else None
+    return CachedTranslator(BACKENDS[backend](**backend_kwargs), cache, rate_limiter=limiter)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark cached translation")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="local")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Simulated latency of the local backend")
+    parser.add_argument("--repeats", type=int, default=10000, help="Cached lookups to time")
+    parser.add_argument("--document", help="Translate this file in chunks instead")
+    parser.add_argument("--workers", type=int, default=4, help="Concurrent requests for --document")
+    parser.add_argument("--rate-limit", type=float, help="Backend requests per second")
+    parser.add_argument("--target", default="french", help="Target language for --document")
+    args = parser.parse_args()
+
+    backend_kwargs = {"latency_ms": args.latency_ms} if args.backend == "local" else {}
+    translator = create_translator(args.backend, rate_limit=args.rate_limit, **backend_kwargs)
+
+    if args.document:
+        with open(args.document, encoding="utf-8") as f:
+            document = f.read()
+        start = time.perf_counter()
+        for done, total, partial in translate_document(translator, document, target=args.target,
+                                                       max_workers=args.workers):
+            pass
+        print(partial)
+        print(json.dumps({"chunks": total, "seconds": time.perf_counter() - start}))
+        return
+
+    text, source, target = "Where is the train station?", "english", "french"
+
+    start = time.perf_counter()
+    translator.translate(text, source, target)
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.repeats):
+        translator.translate(text, source, target)
+    warm = (time.perf_counter() - start) / args.repeats
+
+    print(json.dumps({
+        "backend": args.backend,
+        "cold_ms": 1000 * cold,
+        "cached_us": 1e6 * warm,
+        "stats": translator.stats()
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,43 @@
-import json
-import openai
-from config import OPENAI_API_KEY
+import logging
+import threading
+from typing import Iterator, Optional
+from config import (OPENAI_API_KEY, SEMANTIC_CACHE_ENABLED, SEMANTIC_CACHE_ENCODER,
+                    SEMANTIC_CACHE_THRESHOLD, SEMANTIC_CACHE_MAX_ENTRIES, SEMANTIC_CACHE_TTL)
+from exercise_pool import parse_exercises
+from llm_client import get_client
 
-# Configure OpenAI
-openai.api_key = OPENAI_API_KEY
+logger = logging.getLogger(__name__)
+
+_advice_cache = None
+_advice_cache_loaded = False
+_advice_cache_lock = threading.Lock()
+
+def _build_advice_cache():
+    from content_pack import get_content_pack
+    from semantic_cache import create_semantic_cache, destination_key
+    try:
+        # Questions about different destinations never share an answer
+        return create_semantic_cache(SEMANTIC_CACHE_ENCODER,
+                                     threshold=SEMANTIC_CACHE_THRESHOLD,
+                                     max_entries=SEMANTIC_CACHE_MAX_ENTRIES,
+                                     ttl_seconds=SEMANTIC_CACHE_TTL,
+                                     key=destination_key(get_content_pack().destinations))
+    except Exception as e:
+        # A spelling-based fallback would hand out answers to different questions
+        logger.warning(f"Semantic cache disabled: encoder {SEMANTIC_CACHE_ENCODER!r} unavailable ({str(e)})")
+        return None
+
+def get_advice_cache():
+    """Return the shared semantic cache for travel advice, or None if disabled or unavailable"""
+    global _advice_cache, _advice_cache_loaded
+    if not SEMANTIC_CACHE_ENABLED:
+        return None
+    with _advice_cache_lock:
+        # Built once; a failed encoder is not retried on every question
+        if not _advice_cache_loaded:
+            _advice_cache = _build_advice_cache()
+            _advice_cache_loaded = True
+        return _advice_cache
 
 def translate_text(text, target_lang):
     """Translate text using OpenAI"""
@@ -11,8 +45,7 @@ def translate_text(text, target_lang):
         return "Please set up your OpenAI API key in the .env file"
     
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
+        content = get_client().chat(
             messages=[
                 {
                     "role": "system",
@@ -24,7 +57,7 @@ def translate_text(text, target_lang):
                 }
             ]
         )
-        return response.choices[0].message.content
+        return content
     except Exception as e:
         return f"Translation error: {str(e)}"
 
@@ -34,8 +67,7 @@ def generate_phrases(location, language):
         return ["Please set up your OpenAI API key in the .env file"]
     
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
+        content = get_client().chat(
             messages=[
                 {
                     "role": "system",
@@ -47,56 +79,111 @@ def generate_phrases(location, language):
                 }
             ]
         )
-        phrases = response.choices[0].message.content.split('\n')
+        phrases = content.split('\n')
         return [phrase for phrase in phrases if phrase.strip()]
     except Exception as e:
         return [f"Error generating phrases: {str(e)}"]
 
-def generate_exercises(language, difficulty):
-    """Generate language exercises using OpenAI"""
+def generate_exercises(language, difficulty, count=3, raise_errors=False):
+    """
+    Generate language exercises using OpenAI, keeping only well-formed question/answer/hint items
+
+    Errors give [] unless raise_errors is set, as the exercise pool does so
+    that failed generations are counted and logged.
+    """
     if not OPENAI_API_KEY:
+        if raise_errors:
+            raise RuntimeError("OpenAI API key is not set")
         return []
     
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
+        content = get_client().chat(
             messages=[
                 {
                     "role": "system",
-                    "content": "You are a language teacher creating exercises. Return the response as a JSON array with objects containing 'question', 'answer', and 'hint' fields."
+                    "content": "You are a language teacher creating exercises. Return only a JSON array of objects with string 'question', 'answer', and 'hint' fields, without any other text. Answers should be short so they can be typed and checked exactly."
                 },
                 {
                     "role": "user",
-                    "content": f"Create 3 {difficulty} level {language} exercises focused on travel situations. Include helpful hints."
+                    "content": f"Create {count} {difficulty} level {language} exercises focused on travel situations. Include helpful hints."
                 }
             ]
         )
         
-        content = response.choices[0].message.content
-        exercises = json.loads(content) if isinstance(content, str) else content
-        return exercises
-    except Exception as e:
+        # Tolerates code fences, wrapping objects and prose around the array
+        return parse_exercises(content)
+    except Exception:
+        if raise_errors:
+            raise
         return []
 
+def _advice_messages(query):
+    return [
+        {
+            "role": "system",
+            "content": "You are a knowledgeable travel assistant providing helpful, concise advice to travelers."
+        },
+        {
+            "role": "user",
+            "content": query
+        }
+    ]
+
+def _lookup_advice(query):
+    """Cached answer to a near-duplicate question; cache failures count as misses"""
+    cache = get_advice_cache()
+    if cache is None:
+        return None
+    try:
+        return cache.lookup(query)
+    except Exception as e:
+        logger.warning(f"Semantic cache lookup failed: {str(e)}")
+        return None
+
+def _store_advice(query, answer):
+    cache = get_advice_cache()
+    if cache is None:
+        return
+    try:
+        cache.store(query, answer)
+    except Exception as e:
+        logger.warning(f"Semantic cache store failed: {str(e)}")
+
 def get_travel_advice(query):
-    """Get travel advice using OpenAI"""
+    """Get travel advice using OpenAI, reusing answers to near-duplicate questions"""
     if not OPENAI_API_KEY:
         return "Please set up your OpenAI API key in the .env file"
     
+    cached = _lookup_advice(query)
+    if cached is not None:
+        return cached
+    
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a knowledgeable travel assistant providing helpful, concise advice to travelers."
-                },
-                {
-                    "role": "user",
-                    "content": query
-                }
-            ]
-        )
-        return response.choices[0].message.content
+        content = get_client().chat(messages=_advice_messages(query))
+        _store_advice(query, content)
+        return content
+    except Exception as e:
+        return f"Error: {str(e)}"
+
+def stream_travel_advice(query, cancel_event: Optional[threading.Event] = None) -> Iterator[str]:
+    """Stream travel advice token by token; stops early when cancel_event is set"""
+    if not OPENAI_API_KEY:
+        yield "Please set up your OpenAI API key in the .env file"
+        return
+    
+    cached = _lookup_advice(query)
+    if cached is not None:
+        yield cached
+        return
+    
+    try:
+        parts = []
+        for token in get_client().stream(messages=_advice_messages(query), cancel_event=cancel_event):
+            parts.append(token)
+            yield token
+        
+        # Only complete answers are worth reusing
+        if parts and not (cancel_event is not None and cancel_event.is_set()):
+            _store_advice(query, "".join(parts))
     except Exception as e:
-        return f"Error: {str(e)}" 
\ No newline at end of file
+        yield f"Error: {str(e)}"